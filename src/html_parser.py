@@ -2,8 +2,27 @@
 
 import os
 import re
-from bs4 import BeautifulSoup
-import pandas as pd # Used for reading HTML tables into DataFrames
+import codecs
+import functools
+import lxml.html
+from lxml import etree
+
+# --- Precompiled cleanup patterns (built once at import instead of per call / per paragraph) ---
+# Headers of reference/ancillary sections (same as xml_parser.py); everything from such a
+# header on is dropped.
+# The headers are a fixed set of titles, so a paragraph is classified by one set lookup on its
+# lowercased text instead of a regex scan. Paragraphs longer than the longest title are
+# rejected by their length alone (the callers pass whitespace-normalized paragraphs).
+_ANCILLARY_TITLES = frozenset({
+    'reference', 'references', 'bibliography', 'literature cited',
+    'acknowledgement', 'acknowledgements', 'appendix', 'appendixes',
+    'supporting information', 'supplementary material', 'supplementary materials',
+    'note on contributor', 'note on contributors', 'notes on contributor', 'notes on contributors',
+    'author contribution', 'author contributions', 'funding',
+    'conflict of interest', 'conflicts of interest', 'data availability statement', 'orcid',
+})
+_ANCILLARY_TITLE_MAX_CHARS = max(map(len, _ANCILLARY_TITLES))
+_NUMERIC_ONLY = re.compile(r'^\s*\d+\.?\s*$') # Lone (page/list) numbers
 
 
 # --- Helper Function: _remove_references_from_paragraphs (Keeping consistent with xml_parser.py) ---
@@ -14,38 +33,220 @@ def _remove_references_from_paragraphs(paragraphs: list) -> list:
     """
     if not paragraphs:
         return []
-    reference_section_patterns = [
-        r'^\s*References?\s*$', r'^\s*BIBLIOGRAPHY\s*$', r'^\s*LITERATURE\s+CITED\s*$',
-        r'^\s*Acknowledgement(s)?\s*$', r'^\s*Appendix(es)?\s*$', r'^\s*SUPPORTING\s+INFORMATION\s*$',
-        r'^\s*SUPPLEMENTARY\s+MATERIALS?\s*$', r'^\s*Note(s)?\s+on\s+Contributor(s)?\s*$',
-        r'^\s*AUTHOR\s+CONTRIBUTIONS?\s*$', r'^\s*FUNDING\s*$', r'^\s*CONFLICTS?\s+OF\s+INTEREST\s*$',
-        r'^\s*DATA\s+AVAILABILITY\s+STATEMENT\s*$', r'^\s*ORCID\s*$',
-    ]
-    in_ancillary_section = False
-    processed_paragraphs = []
+    # Single pass: the header cut-off and the short/numeric-only filter share one loop
+    is_numeric_only = _NUMERIC_ONLY.fullmatch # Its pattern allows surrounding whitespace, so no strip() is needed
+    final_cleaned_paragraphs = []
     for p in paragraphs:
-        is_ancillary_header = any(re.fullmatch(pattern, p, re.IGNORECASE) for pattern in reference_section_patterns)
-        if is_ancillary_header:
-            in_ancillary_section = True
-            continue
-        if in_ancillary_section:
-            continue
-        processed_paragraphs.append(p)
-    final_cleaned_paragraphs = [
-        p for p in processed_paragraphs
-        if len(p) > 20 and not re.fullmatch(r'^\s*\d+\.?\s*$', p.strip())
-    ]
+        if len(p) <= _ANCILLARY_TITLE_MAX_CHARS and ' '.join(p.lower().split()) in _ANCILLARY_TITLES:
+            break # Everything after the first header belongs to the ancillary section(s)
+        if len(p) > 20 and not is_numeric_only(p):
+            final_cleaned_paragraphs.append(p)
     return final_cleaned_paragraphs
 
-# --- Helper Function: Convert Pandas DataFrame to Markdown Table Text ---
-def _convert_df_to_markdown_table(df: pd.DataFrame) -> str:
+# --- Precompiled XPath expressions (compiled once at import, reused for every document) ---
+# EXSLT regular expressions let XPath mirror BeautifulSoup's `class_=re.compile(...)` lookups.
+_XPATH_NS = {'re': 'http://exslt.org/regular-expressions'}
+
+def _class_token(name: str) -> str:
+    """XPath predicate equivalent to the CSS class selector `.name`."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_NOISE_XPATH = etree.XPath(" | ".join(
+    ['//script', '//style', '//nav', '//footer', '//header', '//aside', '//noscript',
+     '//a',  # Remove links, their text might be distracting
+     '//button', '//input', '//form',  # Remove interactive elements
+     '//comment()',  # BeautifulSoup's get_text() never returned comment text either
+     "//*[@id='comments']", "//*[@id='sidebar']", "//*[@aria-label='breadcrumbs']"] +
+    [f"//*[{_class_token(c)}]" for c in ('sidebar', 'ad', 'ads', 'header', 'footer', 'navbar',
+                                          'related-articles', 'comments')]
+))
+_TITLE_XPATH = etree.XPath('//title')
+_H1_XPATH = etree.XPath('//h1')
+_META_AUTHOR_XPATH = etree.XPath("//meta[@name='author']")
+_AUTHOR_CLASS_XPATH = etree.XPath("//*[re:test(@class, 'author|contrib-name|contributor', 'i')]",
+                                  namespaces=_XPATH_NS)
+_ABSTRACT_CLASS_XPATH = etree.XPath("//*[re:test(@class, 'abstract', 'i')]", namespaces=_XPATH_NS)
+_META_DESCRIPTION_XPATH = etree.XPath("//meta[@name='description']")
+_META_KEYWORDS_XPATH = etree.XPath("//meta[@name='keywords']")
+_KEYWORD_CLASS_XPATH = etree.XPath("//*[re:test(@class, 'keyword|kwd', 'i')]", namespaces=_XPATH_NS)
+_ARTICLE_XPATH = etree.XPath('//article')
+_MAIN_ID_XPATH = etree.XPath("//*[re:test(@id, 'article-body|main-content|body', 'i')]",
+                             namespaces=_XPATH_NS)
+_MAIN_CLASS_XPATH = etree.XPath("//*[re:test(@class, 'article-body|main-content|body', 'i')]",
+                                namespaces=_XPATH_NS)
+# Headings, paragraphs (excluding captions/table content) and lists, returned in document order
+_CONTENT_XPATH = etree.XPath(
+    './/h1 | .//h2 | .//h3 | .//h4 | .//h5 | .//h6 | '
+    './/p[not(ancestor::caption) and not(ancestor::table)] | .//ul | .//ol'
+)
+_TABLE_XPATH = etree.XPath('//table')
+
+# Raw bytes are handed to lxml, which honours a BOM or <meta charset>; pages that declare
+# neither are decoded as UTF-8 (libxml2 would otherwise assume ISO-8859-1).
+_UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+_CHARSET_DECLARATION = re.compile(rb'<meta[^>]+charset', re.IGNORECASE)
+_UNICODE_BOMS = (codecs.BOM_UTF8, codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)
+_ROW_XPATH = etree.XPath('.//tr')
+_CELL_XPATH = etree.XPath('./th | ./td')
+
+
+def _first(matches: list):
+    """Returns the first XPath match, or None (like BeautifulSoup's find())."""
+    return matches[0] if matches else None
+
+
+def _element_text(element, separator: str = '') -> str:
+    """
+    Returns the stripped text fragments of an lxml element joined by `separator`,
+    equivalent to BeautifulSoup's `get_text(separator=separator, strip=True)`.
+    """
+    return separator.join(s.strip() for s in element.itertext() if s.strip())
+
+
+# --- Helper Function: Parse and clean an HTML file once (shared by all extractors) ---
+@functools.lru_cache(maxsize=32)
+def _load_html_tree(html_file_path: str, mtime_ns: int):
+    """
+    Parses an HTML file and removes noise elements (scripts, navigation, links, ...).
+    Cached on (path, modification time), so extract_from_html and extract_tables_from_html
+    share one parse per file while a rewritten file is parsed again.
+    The returned tree is shared between callers and must be treated as read-only.
+    """
+    # Read bytes and let lxml decode them: skips building an intermediate Python str
+    with open(html_file_path, 'rb') as f:
+        html_bytes = f.read()
+
+    declares_encoding = html_bytes.startswith(_UNICODE_BOMS) or _CHARSET_DECLARATION.search(html_bytes, 0, 4096)
+    doc = lxml.html.document_fromstring(html_bytes, parser=None if declares_encoding else _UTF8_HTML_PARSER)
+
+    # --- Initial Cleaning: Remove noise elements ---
+    for element in _NOISE_XPATH(doc):
+        element.drop_tree() # Remove the element and its contents (its tail text is kept)
+    return doc
+
+
+def _parse_html_tree(html_file_path: str):
+    """Returns the cached, cleaned lxml tree of an HTML file (see _load_html_tree)."""
+    return _load_html_tree(html_file_path, os.stat(html_file_path).st_mtime_ns)
+
+
+# --- Helper Function: Read a <table> element into rows of cell strings ---
+def _extract_table_rows(table_element) -> list:
+    """
+    Returns the rows of an HTML table as lists of whitespace-normalized cell strings
+    (header rows included, in document order). Rows without cells are skipped.
+    """
+    table_rows = []
+    for tr in _ROW_XPATH(table_element):
+        cells = [' '.join(cell.text_content().split()) for cell in _CELL_XPATH(tr)]
+        if cells:
+            table_rows.append(cells)
+    return table_rows
+
+
+# --- Helper Function: Convert Table Rows to Markdown Table Text ---
+def _convert_rows_to_markdown_table(table_rows: list) -> str:
     """
-    Converts a pandas DataFrame to a Markdown table string.
-    This is used for tables extracted from HTML to ensure consistent output format.
+    Converts table rows (first row used as the header) to a Markdown table string,
+    in the same format as the tables extracted by xml_parser.py.
+    Short rows are padded with empty cells so every row has the same number of columns.
     """
-    if df.empty:
+    if not table_rows:
         return ""
-    return df.to_markdown(index=False)
+    n_cols = max(len(row) for row in table_rows)
+    padded_rows = [row + [''] * (n_cols - len(row)) for row in table_rows]
+    header = padded_rows[0]
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|-" + "-|-".join("-" * max(3, len(col)) for col in header) + "-|",
+    ]
+    lines.extend("| " + " | ".join(row) + " |" for row in padded_rows[1:])
+    return "\n".join(lines) + "\n"
+
+
+def table_to_dataframe(table_info: dict):
+    """
+    Wraps an extracted table's 'data_rows' (first row as header) in a pandas DataFrame.
+    pandas is imported only here, so extraction itself does not pay its import cost.
+
+    Args:
+        table_info (dict): One entry of the 'tables_data' list returned by extract_from_html.
+
+    Returns:
+        pandas.DataFrame: The table as a DataFrame (empty if the table has no rows).
+    """
+    import pandas as pd
+
+    table_rows = table_info.get('data_rows') or []
+    if not table_rows:
+        return pd.DataFrame()
+    n_cols = max(len(row) for row in table_rows)
+    padded_rows = [row + [''] * (n_cols - len(row)) for row in table_rows]
+    return pd.DataFrame(padded_rows[1:], columns=padded_rows[0])
+
+
+# --- Helper Function: Extract all tables of a parsed HTML tree ---
+def _extract_tables(doc) -> list:
+    """
+    Extracts every non-empty <table> of a parsed HTML tree: ID, caption, raw rows,
+    and a Markdown text representation for the LLM.
+    """
+    tables_data = []
+    # Tables are read straight from the already-parsed tree instead of re-parsing
+    # the file with pandas.read_html and building a DataFrame per table.
+    for table_tag in _TABLE_XPATH(doc):
+        table_rows = _extract_table_rows(table_tag)
+        if not table_rows:
+            continue
+
+        caption = ""
+        # Try to find caption for the table by looking for <caption/> or <p> near the table
+        # This is a heuristic and might need refinement based on actual HTML structures.
+        caption_tag = table_tag.find('.//caption')
+        if caption_tag is not None and caption_tag.text_content():
+            caption = _element_text(caption_tag)
+        else: # Fallback to common patterns near table, but only if it's not a general paragraph
+            # Look for preceding p tags that might be captions
+            for prev_elem in table_tag.itersiblings(preceding=True):
+                if not isinstance(prev_elem.tag, str):
+                    continue
+                prev_text = _element_text(prev_elem)
+                if prev_elem.tag == 'p' and ('table' in prev_text.lower() or 'fig' in prev_text.lower()) and len(prev_text) < 200:
+                    caption = prev_text
+                    break
+                # Stop if we hit another section/heading before finding caption
+                if prev_elem.tag.startswith('h') or prev_elem.tag in ['div', 'section']:
+                    break
+
+        # Convert table rows to Markdown text
+        markdown_table_text = _convert_rows_to_markdown_table(table_rows)
+
+        tables_data.append({
+            'id': f"HTML_Table_{len(tables_data) + 1}", # Unique ID for HTML tables
+            'caption': caption,
+            'data_rows': table_rows, # Store raw rows as list of lists (first row is the header)
+            'text_representation': markdown_table_text # Text for LLM
+        })
+    return tables_data
+
+
+def extract_tables_from_html(html_file_path: str) -> list | None:
+    """
+    Extracts only the table data from an HTML file. The parsed tree is shared with
+    extract_from_html, so calling both on the same file parses it only once.
+
+    Args:
+        html_file_path (str): The path to the HTML file.
+
+    Returns:
+        list | None: The list of table dictionaries (see extract_from_html's 'tables_data')
+                     if successful, otherwise None.
+    """
+    try:
+        return _extract_tables(_parse_html_tree(html_file_path))
+    except Exception as e:
+        print(f"  [HTML Parser Error] An unexpected error occurred processing {html_file_path}: {e}")
+        return None
 
 
 def extract_from_html(html_file_path: str) -> dict | None:
@@ -54,6 +255,9 @@ def extract_from_html(html_file_path: str) -> dict | None:
     abstract, keywords, body paragraphs, structured sections, and table data.
     It cleans the HTML content before extraction.
 
+    Parsing and traversal use lxml.html with precompiled XPath expressions, which avoids
+    building BeautifulSoup's Python object wrappers for every node of large article pages.
+
     Args:
         html_file_path (str): The path to the HTML file.
 
@@ -73,70 +277,54 @@ def extract_from_html(html_file_path: str) -> dict | None:
     }
 
     try:
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # --- Initial Cleaning: Remove noise elements ---
-        unwanted_selectors = [
-            'script', 'style', 'nav', 'footer', 'header', 'aside',
-            '.sidebar', '.ad', '.ads', '.header', '.footer', '.navbar',
-            '.related-articles', '.comments', '#comments', '#sidebar',
-            '[aria-label="breadcrumbs"]',
-            'noscript',
-            'a', # Remove links, their text might be distracting
-            'button', 'input', 'form' # Remove interactive elements
-        ]
-        for selector in unwanted_selectors:
-            for tag in soup.select(selector):
-                tag.extract() # Remove the tag and its contents
+        doc = _parse_html_tree(html_file_path) # Parsed and cleaned once, shared with extract_tables_from_html
 
         # --- 1. Extract Title ---
-        title_tag = soup.find('title')
-        if title_tag and title_tag.text:
-            extracted_data['title'] = title_tag.text.strip()
+        title_tag = _first(_TITLE_XPATH(doc))
+        if title_tag is not None and title_tag.text_content():
+            extracted_data['title'] = title_tag.text_content().strip()
         else:
-            h1_tag = soup.find('h1')
-            if h1_tag and h1_tag.text:
-                extracted_data['title'] = h1_tag.text.strip()
+            h1_tag = _first(_H1_XPATH(doc))
+            if h1_tag is not None and h1_tag.text_content():
+                extracted_data['title'] = h1_tag.text_content().strip()
 
 
         # --- 2. Extract Authors ---
-        meta_author = soup.find('meta', {'name': 'author'})
-        if meta_author and meta_author.get('content'):
-            extracted_data['authors'].append(meta_author['content'].strip())
+        meta_author = _first(_META_AUTHOR_XPATH(doc))
+        if meta_author is not None and meta_author.get('content'):
+            extracted_data['authors'].append(meta_author.get('content').strip())
         else:
-            author_tags = soup.find_all(class_=re.compile(r'author|contrib-name|contributor', re.IGNORECASE))
+            author_tags = _AUTHOR_CLASS_XPATH(doc)
             if author_tags:
                 for tag in author_tags:
-                    author_name = tag.get_text(strip=True)
+                    author_name = _element_text(tag)
                     if author_name and len(author_name) < 100:
                          extracted_data['authors'].append(author_name)
                 extracted_data['authors'] = list(dict.fromkeys(extracted_data['authors']))
 
         # --- 3. Extract Abstract ---
-        abstract_tag = soup.find(class_=re.compile(r'abstract', re.IGNORECASE)) or \
-                       soup.find('meta', {'name': 'description'})
-        if abstract_tag:
-            if abstract_tag.name == 'meta':
+        abstract_tag = _first(_ABSTRACT_CLASS_XPATH(doc))
+        if abstract_tag is None:
+            abstract_tag = _first(_META_DESCRIPTION_XPATH(doc))
+        if abstract_tag is not None:
+            if abstract_tag.tag == 'meta':
                 abstract_text = abstract_tag.get('content', '')
             else:
-                abstract_text = abstract_tag.get_text(separator=' ', strip=True)
+                abstract_text = _element_text(abstract_tag, separator=' ')
             
             if abstract_text:
-                extracted_data['abstract'] = re.sub(r'\s+', ' ', abstract_text).strip()
+                extracted_data['abstract'] = ' '.join(abstract_text.split())
 
 
         # --- 4. Extract Keywords ---
-        meta_keywords = soup.find('meta', {'name': 'keywords'})
-        if meta_keywords and meta_keywords.get('content'):
-            keywords_str = meta_keywords['content']
+        meta_keywords = _first(_META_KEYWORDS_XPATH(doc))
+        if meta_keywords is not None and meta_keywords.get('content'):
+            keywords_str = meta_keywords.get('content')
             extracted_data['keywords'] = [k.strip() for k in keywords_str.split(',') if k.strip()]
         else:
-            kwd_tags = soup.find_all(class_=re.compile(r'keyword|kwd', re.IGNORECASE))
+            kwd_tags = _KEYWORD_CLASS_XPATH(doc)
             for tag in kwd_tags:
-                kwd_text = tag.get_text(strip=True)
+                kwd_text = _element_text(tag)
                 if kwd_text and len(kwd_text) < 50:
                     extracted_data['keywords'].extend([k.strip() for k in kwd_text.split(',') if k.strip()])
             extracted_data['keywords'] = list(dict.fromkeys(extracted_data['keywords']))
@@ -147,12 +335,14 @@ def extract_from_html(html_file_path: str) -> dict | None:
         # to define sections.
         
         # Look for the most likely main content container. Customize this based on specific journal HTML.
-        main_content_area = soup.find('article') or \
-                            soup.find(id=re.compile(r'article-body|main-content|body', re.IGNORECASE)) or \
-                            soup.find(class_=re.compile(r'article-body|main-content|body', re.IGNORECASE))
+        main_content_area = _first(_ARTICLE_XPATH(doc))
+        if main_content_area is None:
+            main_content_area = _first(_MAIN_ID_XPATH(doc))
+        if main_content_area is None:
+            main_content_area = _first(_MAIN_CLASS_XPATH(doc))
 
-        if not main_content_area:
-            main_content_area = soup.body # Fallback to entire body if no specific main area found
+        if main_content_area is None:
+            main_content_area = doc.find('body') # Fallback to entire body if no specific main area found
 
         # all_body_paragraphs_flat_list will store all main content paragraphs for global filtering
         all_body_paragraphs_flat_list = []
@@ -165,16 +355,12 @@ def extract_from_html(html_file_path: str) -> dict | None:
         current_section_title = "Introduction" # Default for initial content before first heading
         current_section_paragraphs = []
         
-        # Find all top-level headings and paragraphs that are direct children of a potential main content area,
-        # or just iterate through all p and h tags in order.
-        # Use a list of all relevant tags in parsing order
-        content_tags = main_content_area.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'div', 'section'])
+        # Headings, paragraphs and lists of the main content area in parsing order.
+        # Paragraphs inside captions/tables are already excluded by the XPath.
+        content_tags = _CONTENT_XPATH(main_content_area)
         
         for element in content_tags:
-            # Skip elements that are likely captions or table content already handled
-            if element.name == 'p' and element.find_parent(['caption', 'table']):
-                continue
-            if element.name.startswith('h'): # Found a heading, potential new section
+            if element.tag.startswith('h'): # Found a heading, potential new section
                 # If current section has content, save it
                 if current_section_paragraphs:
                     extracted_data['sections'].append({
@@ -184,28 +370,24 @@ def extract_from_html(html_file_path: str) -> dict | None:
                     })
                 
                 # Start new section
-                current_section_title = element.get_text(strip=True)
+                current_section_title = _element_text(element)
                 current_section_paragraphs = []
             
-            elif element.name == 'p': # Found a paragraph
-                p_text = element.get_text(separator=' ', strip=True)
+            elif element.tag == 'p': # Found a paragraph
+                p_text = _element_text(element, separator=' ')
                 if p_text:
-                    cleaned_p_text = re.sub(r'\s+', ' ', p_text).strip()
+                    cleaned_p_text = ' '.join(p_text.split())
                     current_section_paragraphs.append(cleaned_p_text)
                     all_body_paragraphs_flat_list.append(cleaned_p_text) # Add to flat list
 
-            elif element.name in ['ul', 'ol']: # Handle lists within sections
-                list_items_text = [li.get_text(separator=' ', strip=True) for li in element.find_all('li')]
+            elif element.tag in ['ul', 'ol']: # Handle lists within sections
+                list_items_text = [_element_text(li, separator=' ') for li in element.iter('li')]
                 if list_items_text:
                     # Append list items as separate paragraphs or joined as one (LLM prefers paragraphs)
                     for li_text in list_items_text:
-                        cleaned_li_text = re.sub(r'\s+', ' ', li_text).strip()
+                        cleaned_li_text = ' '.join(li_text.split())
                         current_section_paragraphs.append(cleaned_li_text)
                         all_body_paragraphs_flat_list.append(cleaned_li_text)
-            
-            # You might need to add specific handling for <div> or <section> elements
-            # that act as content containers but aren't headings or paragraphs.
-            # This is highly site-specific.
 
         # Add the last section after the loop
         if current_section_paragraphs:
@@ -220,40 +402,7 @@ def extract_from_html(html_file_path: str) -> dict | None:
 
 
         # --- 6. Extract Table Data ---
-        tables_dfs = pd.read_html(html_file_path, flavor='bs4') # Use 'bs4' flavor with BeautifulSoup
-
-        for i, df in enumerate(tables_dfs):
-            caption = ""
-            # Try to find caption for the table by looking for <caption/> or <p> near the table
-            # This is a heuristic and might need refinement based on actual HTML structures.
-            # We need to find the *original* table tag in the soup first.
-            original_table_tags = soup.find_all('table')
-            if i < len(original_table_tags):
-                table_tag = original_table_tags[i]
-                caption_tag = table_tag.find('caption')
-                if caption_tag and caption_tag.text:
-                    caption = caption_tag.get_text(strip=True)
-                else: # Fallback to common patterns near table, but only if it's not a general paragraph
-                    # Look for preceding p tags that might be captions
-                    prev_elements = table_tag.find_previous_siblings()
-                    for prev_elem in prev_elements:
-                        if prev_elem.name == 'p' and ('table' in prev_elem.get_text(strip=True).lower() or 'fig' in prev_elem.get_text(strip=True).lower()) and len(prev_elem.get_text(strip=True)) < 200:
-                            caption = prev_elem.get_text(strip=True)
-                            break
-                        # Stop if we hit another section/heading before finding caption
-                        if prev_elem.name.startswith('h') or prev_elem.name in ['div', 'section']:
-                            break
-
-            # Convert DataFrame to Markdown text
-            markdown_table_text = _convert_df_to_markdown_table(df)
-
-            extracted_data['tables_data'].append({
-                'id': f"HTML_Table_{i+1}", # Unique ID for HTML tables
-                'caption': caption,
-                'data_rows': df.values.tolist(), # Store raw rows as list of lists
-                'text_representation': markdown_table_text # Text for LLM
-            })
-        
+        extracted_data['tables_data'] = _extract_tables(doc)
 
     except Exception as e:
         print(f"  [HTML Parser Error] An unexpected error occurred processing {html_file_path}: {e}")
@@ -0,0 +1,126 @@
+# src/llm_cache.py
+
+import copy
+import functools
+import inspect
+import json
+import os
+from collections import OrderedDict
+
+try:
+    from .prompt_builder import prompt_hash # Imported as part of the src package
+except ImportError:
+    from prompt_builder import prompt_hash # Run with src/ on sys.path
+
+try:
+    import diskcache # Optional: persistent cache of LLM results (thread- and process-safe)
+except ImportError:
+    diskcache = None
+
+# Directory of the persistent LLM result cache (used only if `diskcache` is installed)
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".llm_cache")
+
+# Number of results kept in the in-process cache, in front of the persistent one
+LLM_MEMORY_CACHE_SIZE = int(os.getenv("LLM_MEMORY_CACHE_SIZE", "1024"))
+
+_memory_cache = OrderedDict() # cache key -> parsed result, least recently used first
+
+
+@functools.lru_cache(maxsize=1)
+def _get_disk_cache():
+    """Opens the persistent LLM result cache once, or returns None if diskcache is unavailable."""
+    if diskcache is None:
+        return None
+    return diskcache.Cache(LLM_CACHE_DIR)
+
+
+def llm_cache_key(prompt: str, model_name: str, response_schema: dict | None = None) -> str:
+    """
+    Cache key of an LLM call: the prompt_hash of the full prompt, qualified by the model name
+    and the response schema (if any), since either changes the response.
+    """
+    key = model_name + "|" + prompt
+    if response_schema is not None:
+        key += "|" + json.dumps(response_schema, sort_keys=True)
+    return prompt_hash(key)
+
+
+def lookup_cached_result(cache_key: str):
+    """Returns the cached parsed result for `cache_key`, or None on a miss."""
+    cached_data = _memory_cache.get(cache_key)
+    if cached_data is not None:
+        _memory_cache.move_to_end(cache_key)
+    else:
+        disk_cache = _get_disk_cache()
+        cached_data = disk_cache.get(cache_key) if disk_cache is not None else None
+        if cached_data is None:
+            return None
+        _remember(cache_key, cached_data)
+    print("[LLM Cache] Cache hit: returning stored LLM result.")
+    # Callers get their own copy, so modifying a result cannot alter the cached one
+    return copy.deepcopy(cached_data)
+
+
+def store_cached_result(cache_key: str, parsed_data) -> None:
+    """Stores a successfully parsed result; failed calls (None) are never cached."""
+    if parsed_data is None:
+        return
+    _remember(cache_key, copy.deepcopy(parsed_data))
+    disk_cache = _get_disk_cache()
+    if disk_cache is not None:
+        disk_cache.set(cache_key, parsed_data)
+
+
+def _remember(cache_key: str, parsed_data) -> None:
+    """Adds a result to the in-process cache, evicting the least recently used entry if full."""
+    _memory_cache[cache_key] = parsed_data
+    _memory_cache.move_to_end(cache_key)
+    if len(_memory_cache) > LLM_MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+def cached_llm_call(func):
+    """
+    Decorator adding the LLM result cache to an LLM call function (sync or async).
+
+    The decorated function must take `prompt` and `model_name` arguments, and may take
+    `response_schema` and `force_refresh`. Results are looked up by llm_cache_key first in an
+    in-process LRU cache and then in the persistent diskcache (if installed); the function
+    itself only runs on a miss, or when force_refresh is True. Successful results are
+    stored in both caches; None results and raised errors are never cached.
+    """
+    signature = inspect.signature(func)
+
+    def cache_key_for(args, kwargs) -> tuple[str, bool]:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = bound.arguments
+        cache_key = llm_cache_key(arguments["prompt"], arguments["model_name"], arguments.get("response_schema"))
+        return cache_key, arguments.get("force_refresh", False)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            cache_key, force_refresh = cache_key_for(args, kwargs)
+            if not force_refresh:
+                cached_data = lookup_cached_result(cache_key)
+                if cached_data is not None:
+                    return cached_data
+            parsed_data = await func(*args, **kwargs)
+            store_cached_result(cache_key, parsed_data)
+            return parsed_data
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        cache_key, force_refresh = cache_key_for(args, kwargs)
+        if not force_refresh:
+            cached_data = lookup_cached_result(cache_key)
+            if cached_data is not None:
+                return cached_data
+        parsed_data = func(*args, **kwargs)
+        store_cached_result(cache_key, parsed_data)
+        return parsed_data
+
+    return wrapper
@@ -2,23 +2,77 @@
 
 import os
 import json
+import asyncio
+import functools
 import re
 import google.generativeai as genai
 
+try:
+    from .llm_cache import cached_llm_call # Imported as part of the src package
+except ImportError:
+    from llm_cache import cached_llm_call # Run with src/ on sys.path
+
+try:
+    import orjson # Optional: several times faster than json.loads on large responses
+except ImportError:
+    orjson = None
+
 # IMPORTANT: Remove these if they are still present from previous versions
 # from dotenv import load_dotenv
 # load_dotenv()
 
-def initialize_gemini_model(model_name: str = "gemini-1.5-flash"): # <-- CHANGED DEFAULT MODEL HERE
+# Markdown ```json fence around an LLM response (compiled once at import)
+_JSON_FENCE = re.compile(r'```json\n(.*)\n```', re.DOTALL)
+
+# Ask Gemini for raw JSON output, so responses normally arrive without a markdown fence
+_JSON_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers handle both alike
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+class LLMResponseError(Exception):
     """
-    Initializes and configures the Google Gemini model.
+    Raised when a call made with a response_schema does not yield valid JSON.
+    Unlike the schema-less path (which returns None), the error reaches the caller,
+    so a retry is a deliberate decision rather than a silent reparse loop.
+    """
+
+
+def build_response_schema(desired_info: list) -> dict:
+    """
+    Builds a Gemini response schema for the output requested by build_extraction_prompt:
+    a JSON array with one object per nanoparticle formulation, each holding every
+    requested field as a string ('N/A' when not found).
 
     Args:
-        model_name (str): The specific Gemini model to use (e.g., "gemini-pro", "gemini-1.5-pro", "gemini-1.5-flash").
-                          The default is now "gemini-1.5-flash" for better compatibility.
+        desired_info (list): The same list of field names passed to build_extraction_prompt.
 
     Returns:
-        google.generativeai.GenerativeModel: The initialized Gemini model object.
+        dict: A schema usable as the `response_schema` argument of call_llm_for_extraction.
+    """
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {info: {"type": "string"} for info in desired_info},
+            "required": list(desired_info),
+        },
+    }
+
+
+def _generation_config(response_schema: dict | None) -> dict:
+    """Generation config for a call, constraining the output to `response_schema` if given."""
+    if response_schema is None:
+        return _JSON_GENERATION_CONFIG
+    return {**_JSON_GENERATION_CONFIG, "response_schema": response_schema}
+
+@functools.lru_cache(maxsize=1)
+def _configure_once() -> None:
+    """
+    Configures the Gemini client with GOOGLE_API_KEY exactly once per process.
+    A missing key raises ValueError and is not cached, so a later call can succeed
+    once the key has been set.
     """
     api_key = os.getenv("GOOGLE_API_KEY")
 
@@ -29,6 +83,23 @@ def initialize_gemini_model(model_name: str = "gemini-1.5-flash"): # <-- CHANGED
         )
 
     genai.configure(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=4)
+def initialize_gemini_model(model_name: str = "gemini-1.5-flash"): # <-- CHANGED DEFAULT MODEL HERE
+    """
+    Initializes and configures the Google Gemini model.
+    The model object is cached per model name, so repeated calls (e.g. one per document
+    in a batch) reuse it instead of reconfiguring the client and rebuilding the model.
+
+    Args:
+        model_name (str): The specific Gemini model to use (e.g., "gemini-pro", "gemini-1.5-pro", "gemini-1.5-flash").
+                          The default is now "gemini-1.5-flash" for better compatibility.
+
+    Returns:
+        google.generativeai.GenerativeModel: The initialized Gemini model object.
+    """
+    _configure_once()
     print(f"[LLM Interface] Initializing Gemini model: {model_name}")
     
     # You can uncomment the following lines to list available models for debugging
@@ -39,72 +110,205 @@ def initialize_gemini_model(model_name: str = "gemini-1.5-flash"): # <-- CHANGED
     model = genai.GenerativeModel(model_name)
     return model
 
-def call_llm_for_extraction(prompt: str, model_name: str = "gemini-1.5-flash") -> dict | None: # <-- CHANGED DEFAULT MODEL HERE TOO
+def _parse_llm_response(response, structured: bool = False) -> dict | None:
+    """
+    Extracts the text of a Gemini response and parses it as JSON
+    (shared by the synchronous and asynchronous call paths).
+
+    Args:
+        response: The response object returned by generate_content / generate_content_async.
+        structured (bool): True if the call was made with a response_schema. The output is
+                           then raw JSON by construction, so the markdown fence handling is
+                           skipped and failures raise LLMResponseError instead of returning None.
+
+    Returns:
+        dict | None: The parsed JSON data, or None if the response is empty or not valid JSON.
+    """
+    # Check for response safety attributes or other issues before accessing text
+    if not response.candidates:
+        if structured:
+            raise LLMResponseError("LLM returned no candidates (possible safety filter or empty response).")
+        print("[LLM Interface Error] LLM returned no candidates (possible safety filter or empty response).")
+        # You might want to inspect response.prompt_feedback or response.candidates[0].safety_ratings here
+        return None
+
+    response_text = ""
+    # Access the text from the response's first candidate
+    if hasattr(response.candidates[0], 'text'):
+        response_text = response.candidates[0].text
+    elif hasattr(response.candidates[0], 'content') and hasattr(response.candidates[0].content, 'parts'):
+        # This is a more robust way to get text from parts, especially if it's structured
+        response_text = "".join([part.text for part in response.candidates[0].content.parts if hasattr(part, 'text')])
+
+    if not response_text:
+        if structured:
+            raise LLMResponseError("LLM returned an empty text response from candidates.")
+        print("[LLM Interface Error] LLM returned an empty text response from candidates.")
+        return None
+
+    print(f"[LLM Interface] LLM response received (length: {len(response_text)} chars).")
+
+    if structured:
+        # Schema-constrained output is plain JSON: no fence to strip, and a parse failure is an error
+        try:
+            parsed_data = _json_loads(response_text)
+        except json.JSONDecodeError as e:
+            raise LLMResponseError(
+                f"Schema-constrained LLM response is not valid JSON: {e} "
+                f"(first 500 chars: {response_text[:500]})"
+            ) from e
+        print("[LLM Interface] Structured LLM response successfully parsed as JSON.")
+        return parsed_data
+
+    # Attempt to parse the response as JSON.
+    # The substring test is much cheaper than a DOTALL regex scan and skips the scan
+    # entirely for the common case of a raw JSON response.
+    json_match = _JSON_FENCE.search(response_text) if "```json" in response_text else None
+    if json_match:
+        json_string = json_match.group(1).strip()
+        print("[LLM Interface] Detected JSON markdown block.")
+    else:
+        json_string = response_text.strip()
+        print("[LLM Interface] No JSON markdown block found. Attempting to parse raw response.")
+
+    try:
+        parsed_data = _json_loads(json_string)
+    except json.JSONDecodeError as e:
+        print(f"[LLM Interface Error] Failed to parse LLM response as JSON: {e}")
+        print(f"  Problematic response text (first 500 chars): {response_text[:500]}...")
+        return None
+    print("[LLM Interface] LLM response successfully parsed as JSON.")
+    return parsed_data
+
+
+@cached_llm_call
+def call_llm_for_extraction(prompt: str, model_name: str = "gemini-1.5-flash", force_refresh: bool = False, # <-- CHANGED DEFAULT MODEL HERE TOO
+                            response_schema: dict | None = None) -> dict | None:
     """
     Sends a constructed prompt to the Gemini LLM for information extraction
     and attempts to parse the JSON response.
 
+    This synchronous version deliberately does not wrap call_llm_batch in asyncio.run(),
+    so it keeps working inside notebooks (e.g. Colab) that already run an event loop.
+    Parsed results are cached (in process, and on disk if diskcache is installed) keyed by
+    a hash of (model_name, prompt, response_schema), so re-running the same prompt costs no
+    API call; see llm_cache.cached_llm_call.
+
     Args:
         prompt (str): The full prompt string prepared by prompt_builder.py.
         model_name (str): The specific Gemini model to use.
+        force_refresh (bool): If True, ignore any cached result and call the LLM again.
+        response_schema (dict | None): Optional schema (see build_response_schema) that the
+                                       model's JSON output is constrained to.
 
     Returns:
         dict | None: A dictionary containing the extracted data if successful and
                      valid JSON is returned, otherwise None.
+
+    Raises:
+        LLMResponseError: If `response_schema` is given and the response is not valid JSON.
     """
     model = initialize_gemini_model(model_name)
 
     try:
         print(f"[LLM Interface] Sending prompt (length: {len(prompt)} chars) to LLM...")
         # Use generate_content for single-turn conversations
-        response = model.generate_content(prompt, stream=False) # stream=False waits for full response
-
-        # Check for response safety attributes or other issues before accessing text
-        if not response.candidates:
-            print("[LLM Interface Error] LLM returned no candidates (possible safety filter or empty response).")
-            # You might want to inspect response.prompt_feedback or response.candidates[0].safety_ratings here
-            return None
-
-        response_text = ""
-        # Access the text from the response's first candidate
-        if hasattr(response.candidates[0], 'text'):
-            response_text = response.candidates[0].text
-        elif hasattr(response.candidates[0], 'content') and hasattr(response.candidates[0].content, 'parts'):
-            # This is a more robust way to get text from parts, especially if it's structured
-            response_text = "".join([part.text for part in response.candidates[0].content.parts if hasattr(part, 'text')])
-
-        if not response_text:
-            print("[LLM Interface Error] LLM returned an empty text response from candidates.")
-            return None
-
-        print(f"[LLM Interface] LLM response received (length: {len(response_text)} chars).")
-
-        # Attempt to parse the response as JSON
-        json_match = re.search(r'```json\n(.*)\n```', response_text, re.DOTALL)
-        if json_match:
-            json_string = json_match.group(1).strip()
-            print("[LLM Interface] Detected JSON markdown block.")
-        else:
-            json_string = response_text.strip()
-            print("[LLM Interface] No JSON markdown block found. Attempting to parse raw response.")
-
-        parsed_data = json.loads(json_string)
-        print("[LLM Interface] LLM response successfully parsed as JSON.")
-        return parsed_data
+        response = model.generate_content(prompt, stream=False, # stream=False waits for full response
+                                          generation_config=_generation_config(response_schema))
+        return _parse_llm_response(response, structured=response_schema is not None)
 
+    except LLMResponseError:
+        raise
     except ValueError as e:
         print(f"[LLM Interface Error] API Key/Model Error: {e}. Please ensure your API key is correctly set and model name is valid.")
         return None
-    except json.JSONDecodeError as e:
-        print(f"[LLM Interface Error] Failed to parse LLM response as JSON: {e}")
-        print(f"  Problematic response text (first 500 chars): {response_text[:500]}...")
-        return None
     except Exception as e:
         print(f"[LLM Interface Error] An unexpected error occurred during LLM call: {e}")
-        # The original error might be caught here if it's not a ValueError or JSONDecodeError
-        print(f"  Response object (if available): {response_text[:500] if 'response_text' in locals() else 'N/A'}")
         return None
 
+
+@cached_llm_call
+async def call_llm_for_extraction_async(prompt: str, model_name: str = "gemini-1.5-flash", force_refresh: bool = False,
+                                        response_schema: dict | None = None) -> dict | None:
+    """
+    Asynchronous version of call_llm_for_extraction. Awaiting the Gemini round trip
+    lets many prompts be in flight at once (see call_llm_batch). Shares the result cache
+    with call_llm_for_extraction.
+
+    Args:
+        prompt (str): The full prompt string prepared by prompt_builder.py.
+        model_name (str): The specific Gemini model to use.
+        force_refresh (bool): If True, ignore any cached result and call the LLM again.
+        response_schema (dict | None): Optional schema the model's JSON output is constrained to.
+
+    Returns:
+        dict | None: The parsed JSON data if successful, otherwise None.
+
+    Raises:
+        LLMResponseError: If `response_schema` is given and the response is not valid JSON.
+    """
+    model = initialize_gemini_model(model_name)
+
+    try:
+        print(f"[LLM Interface] Sending prompt (length: {len(prompt)} chars) to LLM (async)...")
+        response = await model.generate_content_async(prompt, generation_config=_generation_config(response_schema))
+        return _parse_llm_response(response, structured=response_schema is not None)
+
+    except LLMResponseError:
+        raise
+    except ValueError as e:
+        print(f"[LLM Interface Error] API Key/Model Error: {e}. Please ensure your API key is correctly set and model name is valid.")
+        return None
+    except Exception as e:
+        print(f"[LLM Interface Error] An unexpected error occurred during async LLM call: {e}")
+        return None
+
+
+async def call_llm_batch(prompts, model_name: str = "gemini-1.5-flash", concurrency: int = 16,
+                         force_refresh: bool = False, response_schema: dict | None = None) -> list:
+    """
+    Sends many prompts to the Gemini LLM concurrently, with at most `concurrency`
+    requests in flight (tune this to your Gemini QPS quota).
+
+    Args:
+        prompts: Prompt strings prepared by prompt_builder.py, as a list (or any iterable) or as
+                 an async iterable such as prompt_builder.abuild_extraction_prompts. An async
+                 iterable is only advanced when a request slot is free, so prompts are produced
+                 at the rate they are sent.
+        model_name (str): The specific Gemini model to use.
+        concurrency (int): Maximum number of simultaneous requests.
+        force_refresh (bool): If True, bypass the result cache for every prompt.
+        response_schema (dict | None): Optional schema every response is constrained to.
+
+    Returns:
+        list: The parsed result (dict | None) for each prompt, in the same order as `prompts`.
+              With a `response_schema`, a failed prompt yields its LLMResponseError in place
+              of a result, so the caller can retry exactly the failed prompts.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    return_exceptions = response_schema is not None
+
+    async def bounded(prompt: str) -> dict | None:
+        async with semaphore:
+            return await call_llm_for_extraction_async(prompt, model_name, force_refresh=force_refresh,
+                                                       response_schema=response_schema)
+
+    if not hasattr(prompts, "__aiter__"):
+        return await asyncio.gather(*(bounded(p) for p in prompts), return_exceptions=return_exceptions)
+
+    async def send_acquired(prompt: str) -> dict | None:
+        try:
+            return await call_llm_for_extraction_async(prompt, model_name, force_refresh=force_refresh,
+                                                       response_schema=response_schema)
+        finally:
+            semaphore.release()
+
+    tasks = []
+    async for prompt in prompts:
+        await semaphore.acquire() # Wait for a free slot before pulling the next prompt
+        tasks.append(asyncio.ensure_future(send_acquired(prompt)))
+    return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
 # --- Example Usage (for testing this module directly) ---
 if __name__ == "__main__":
     test_prompt = """You are a helpful AI. Extract product and price from: The new SuperWidget 5000 is $199.99. Output as JSON."""
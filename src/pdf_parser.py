@@ -1,100 +1,213 @@
 from pypdf import PdfReader
+from concurrent.futures import ProcessPoolExecutor
 import os
 import re
 
+try:
+    import pymupdf # PyMuPDF >= 1.24.3
+except ImportError:
+    try:
+        import fitz as pymupdf # Older PyMuPDF releases only provide the `fitz` module name
+    except ImportError:
+        pymupdf = None
+
+# Text extraction backend: "pymupdf" (default, C-backed and much faster) or "pypdf".
+# Set PDF_TEXT_BACKEND=pypdf to reproduce results obtained with the original pypdf extraction.
+PDF_TEXT_BACKEND = os.getenv("PDF_TEXT_BACKEND", "pymupdf").lower()
+
+# --- Precompiled regular expressions (compiled once at import instead of per call / per paragraph) ---
+_DIGITS_ONLY = re.compile(r'\d+')
+
+
+# Code points scanned by _build_para_start_class: the BMP and the Supplementary Multilingual
+# Plane. The higher planes hold CJK ideographs, tags, private use and unassigned code points,
+# none of which are uppercase letters or digits.
+_PARA_START_SCAN_END = 0x20000
+
+
+def _build_para_start_class() -> str:
+    """
+    Builds a regex character class of every code point (including astral ones such as
+    U+1D400) for which str.isupper() or str.isdigit() is true, i.e. the characters that
+    may start a new paragraph line. The classification table is computed once at import
+    (about 50 ms), so matching a line start is a single set-membership test inside the
+    regex engine instead of Python method calls.
+    """
+    chars = "".join(map(chr, range(_PARA_START_SCAN_END)))
+    # One flag byte per code point; the runs of set flags become the ranges of the class
+    flags = bytes(u or d for u, d in zip(map(str.isupper, chars), map(str.isdigit, chars)))
+    ranges = []
+    for run in re.finditer(b"\x01+", flags):
+        first, last = chars[run.start()], chars[run.end() - 1]
+        ranges.append(re.escape(first) if first == last else f"{re.escape(first)}-{re.escape(last)}")
+    return "[" + "".join(ranges) + "]"
+
+
+# Paragraph boundaries for split_text_into_paragraphs:
+#   Rule 1: an empty (or whitespace-only) line signals a new paragraph.
+#   Rule 2: a line ending with sentence punctuation (. ? !) followed by a line starting with an
+#           uppercase letter, a digit, "Fig." or "Table" (common for headings/new sentences).
+#   Any other newline is a line wrap within the same paragraph (e.g. multi-column layouts).
+_PARA_BREAK = re.compile(
+    r'\n\s*\n'
+    r'|(?<=[.?!])[^\S\n]*\n(?=[^\S\n]*(?:' + _build_para_start_class() + r'|(?i:fig\.|table)))'
+)
+
+# 常见参考文献标题的正则表达式模式（不区分大小写，可能前面有数字或空格）
+# 使用 \b 确保是整个单词匹配，避免匹配到其他地方的 "reference"
+# 使用 re.IGNORECASE 忽略大小写
+_REFERENCE_PATTERNS = [
+    r'\bReferences?\b',          # "References", "Reference"
+    r'\bBIBLIOGRAPHY\b',         # "BIBLIOGRAPHY"
+    r'\bLITERATURE\s+CITED\b',   # "LITERATURE CITED"
+    r'\bAcknowledgement(s)?\b',  # 有些文献References前会有致谢
+    r'\bAppendix(es)?\b',        # 附录通常也在最后
+    r'\bSUPPORTING\s+INFORMATION\b', # 某些期刊的补充信息
+    r'\bSUPPLEMENTARY\s+MATERIALS?\b', # 补充材料
+]
+# 将所有模式组合成一个大的正则表达式，并编译以提高效率
+_REF_HEADER = re.compile(r'|'.join(_REFERENCE_PATTERNS), re.IGNORECASE)
+# 参考文献等部分总在文档末尾：只在最后这么多字符中查找 (only the tail of the text is scanned)
+_REF_SEARCH_TAIL_CHARS = 200_000
+
+
+def _iter_page_texts(pdf_path):
+    """
+    逐页生成PDF文本 (yields the text of each page in order), using PyMuPDF when it is
+    available and selected, otherwise pypdf.
+    """
+    if PDF_TEXT_BACKEND != "pypdf" and pymupdf is not None:
+        with pymupdf.open(pdf_path) as doc:
+            for page in doc:
+                # PyMuPDF ends every line with a newline; strip the trailing one so pages
+                # are joined exactly like pypdf's extract_text() output
+                yield page.get_text("text").rstrip("\n")
+    else:
+        reader = PdfReader(pdf_path)
+        for page in reader.pages:
+            yield page.extract_text()
+
+
 def extract_text_from_pdf(pdf_path):
     """
     从PDF文件中提取所有文本内容。
-    (Keep your existing extract_text_from_pdf function, or update to PyMuPDF if it helps)
+    Uses PyMuPDF (fitz) by default; see PDF_TEXT_BACKEND for the pypdf fallback.
     """
-    # Assuming you are using pypdf for simplicity here.
-    # If you switched to PyMuPDF, ensure this function reflects that.
-    from pypdf import PdfReader
-    text = ""
+    # Collect page texts in a list and join once: repeated `str +=` is quadratic in document size
+    page_texts = []
     try:
-        reader = PdfReader(pdf_path)
-        for page in reader.pages:
-            extracted_page_text = page.extract_text()
+        for extracted_page_text in _iter_page_texts(pdf_path):
             if extracted_page_text:
-                text += extracted_page_text + "\n" # Adding single newline after each page, common for pypdf
+                page_texts.append(extracted_page_text)
     except Exception as e:
         print(f"Error extracting text from {pdf_path}: {e}")
         return None
-    return text
+    if not page_texts:
+        return ""
+    return "\n".join(page_texts) + "\n" # Single newline after each page
+
+def extract_text_from_pdfs(pdf_paths: list[str], max_workers: int | None = None) -> dict[str, str | None]:
+    """
+    Extracts the text of many PDF files in parallel worker processes.
+    PDF text extraction is CPU-bound, so processes (not threads or asyncio) are used.
+
+    Args:
+        pdf_paths (list[str]): Paths of the PDF files to extract.
+        max_workers (int | None): Number of worker processes. Defaults to os.cpu_count().
+
+    Returns:
+        dict[str, str | None]: Maps each path to its extracted text (None if extraction failed).
+    """
+    if not pdf_paths:
+        return {}
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        texts = executor.map(extract_text_from_pdf, pdf_paths, chunksize=4)
+        return dict(zip(pdf_paths, texts))
+
+def _clean_paragraphs(raw_paragraphs):
+    """
+    Normalizes raw paragraph chunks and yields only the ones worth keeping.
+    Shared by split_text_into_paragraphs and iter_paragraphs_from_pdf.
+    """
+    # Final Cleaning: Remove very short paragraphs that might be noise (e.g., page numbers, single words)
+    # Be cautious not to remove valid short sentences or titles.
+    # Remove common headers/footers if they slipped through (customize as needed)
+    # e.g. "Journal of" in p or "Copyright" in p
+    for raw_p in raw_paragraphs:
+        # Join wrapped lines and collapse multiple spaces into one; str.split() with no
+        # separator is equivalent to re.sub(r'\s+', ' ', p).strip() but runs without the regex engine
+        p = ' '.join(raw_p.split())
+        if len(p) >= 10 and not _DIGITS_ONLY.fullmatch(p): # Drop very short paragraphs and lone (page) numbers
+            yield p
+
 
 def split_text_into_paragraphs(text):
     """
     智能地将文本分割成段落，使用多种启发式规则。
     适用于单换行符 \n 同时代表行内换行和段落换行的情况。
+    The line-by-line heuristics are expressed in the single compiled pattern _PARA_BREAK,
+    so the whole text is segmented by one re.split() call running in C.
     """
     if not text:
         return []
 
-    # 1. Standardize newlines and split into individual lines
-    lines = text.replace('\r\n', '\n').split('\n')
-
-    paragraphs = []
-    current_paragraph_lines = []
-
-    # Common sentence ending punctuation
-    sentence_enders = ['.', '?', '!']
-
-    for i, line in enumerate(lines):
-        stripped_line = line.strip()
-
-        # Rule 1: Empty line signals a new paragraph
-        if not stripped_line:
-            if current_paragraph_lines: # If there's content in the current paragraph
-                paragraphs.append(" ".join(current_paragraph_lines))
-                current_paragraph_lines = [] # Reset for next paragraph
-            continue # Move to the next line
-
-        # Add the current line to the current paragraph
-        current_paragraph_lines.append(stripped_line)
-
-        # Rule 2: Heuristic for end of sentence + start of new line (likely a new paragraph)
-        # This is the trickiest part for scientific texts.
-        # Check if the line ends with common sentence-ending punctuation
-        # AND if the next line exists and starts with an uppercase letter or number (new sentence/heading)
-        if i < len(lines) - 1: # Check if it's not the last line
-            next_line = lines[i+1].strip()
-            # If the current line ends with a sentence terminator
-            if stripped_line and stripped_line[-1] in sentence_enders:
-                # And the next line exists and starts with an uppercase letter or a digit (common for headings/new sentences)
-                if next_line and (next_line[0].isupper() or next_line[0].isdigit() or next_line.lower().startswith(('fig.', 'table'))):
-                    # We found a strong candidate for a paragraph break
-                    if current_paragraph_lines:
-                        paragraphs.append(" ".join(current_paragraph_lines))
-                        current_paragraph_lines = []
-                        continue # Move to next line (which starts a new paragraph)
-            
-            # Rule 3: Handling cases where line wraps within a paragraph (e.g., multi-column, no sentence ender)
-            # If current line does NOT end with a sentence ender, AND next line does NOT start with uppercase,
-            # it's likely a line wrap within the same paragraph.
-            # We already appended it. We just *don't* force a paragraph break here.
-
-    # Add the last paragraph (if any content remains)
-    if current_paragraph_lines:
-        paragraphs.append(" ".join(current_paragraph_lines))
+    # Standardize newlines and split at every paragraph boundary in one regex pass
+    paragraphs = _PARA_BREAK.split(text.replace('\r\n', '\n'))
+    return list(_clean_paragraphs(paragraphs))
 
-    # Final Cleaning: Remove very short paragraphs that might be noise (e.g., page numbers, single words)
-    # Be cautious not to remove valid short sentences or titles.
-    cleaned_paragraphs = []
-    for p in paragraphs:
-        # Remove empty or extremely short paragraphs
-        if len(p) < 10: # Adjust threshold as needed
-            continue
-        # Remove lines that are only numbers (likely page numbers)
-        if re.fullmatch(r'\d+', p):
+
+def _pop_boundary_window(pieces: list) -> str:
+    """
+    Removes and returns the end of the carried text (held as the list `pieces`) that a
+    paragraph boundary with the next page's text can involve. _PARA_BREAK only consumes
+    whitespace, and a match can only be completed by the following text at the carried
+    text's last newline, so the window starts at the character before the whitespace run
+    around that newline (the lookbehind). Everything before it is left in `pieces`.
+    """
+    window = ""
+    while pieces:
+        window = pieces.pop() + window
+        cut = window.rfind("\n")
+        if cut < 0:
             continue
-        # Remove common headers/footers if they slipped through (customize as needed)
-        # if "Journal of" in p or "Copyright" in p:
-        #     continue
+        while cut > 0 and window[cut - 1].isspace():
+            cut -= 1
+        if cut > 0:
+            pieces.append(window[:cut - 1])
+            return window[cut - 1:]
+    return window
+
+
+def iter_paragraphs_from_pdf(pdf_path):
+    """
+    逐页流式地从PDF中生成段落 (streaming version of
+    split_text_into_paragraphs(extract_text_from_pdf(pdf_path)), yielding the same paragraphs).
+
+    Pages are segmented as they are extracted; the unfinished last paragraph of a page is
+    carried over to the next one, so paragraphs spanning page breaks are preserved and the
+    full document text is never materialized. Only the end of the carried paragraph is
+    segmented again with each page (see _pop_boundary_window), so a paragraph spanning many
+    pages costs linear, not quadratic, time. If extraction fails part way, the paragraphs read
+    so far, including the unfinished last one, are still yielded. Use list(...) if a list is needed.
+    """
+    carried = [] # Pieces of the text after the last paragraph boundary seen so far
+    try:
+        for page_text in _iter_page_texts(pdf_path):
+            if not page_text:
+                continue
+            # Same page joining as extract_text_from_pdf: a single newline after each page
+            chunks = _PARA_BREAK.split(_pop_boundary_window(carried) + (page_text + "\n").replace('\r\n', '\n'))
+            if len(chunks) > 1:
+                chunks[0] = "".join(carried) + chunks[0]
+                carried = []
+            # The last chunk can still continue on the next page
+            carried.append(chunks.pop())
+            yield from _clean_paragraphs(chunks)
+    except Exception as e:
+        print(f"Error extracting text from {pdf_path}: {e}")
+    yield from _clean_paragraphs(["".join(carried)])
 
-        # Replace multiple spaces with a single space (from joining lines)
-        cleaned_paragraphs.append(re.sub(r'\s+', ' ', p).strip())
 
-    return cleaned_paragraphs
 # 在你的 src/pdf_parser.py 文件中添加或修改一个函数
 
 def remove_references_section(text):
@@ -104,25 +217,11 @@ def remove_references_section(text):
     if not text:
         return ""
 
-    # 常见参考文献标题的正则表达式模式（不区分大小写，可能前面有数字或空格）
-    # 使用 \b 确保是整个单词匹配，避免匹配到其他地方的 "reference"
-    # 使用 re.IGNORECASE 忽略大小写
-    reference_patterns = [
-        r'\bReferences?\b',          # "References", "Reference"
-        r'\bBIBLIOGRAPHY\b',         # "BIBLIOGRAPHY"
-        r'\bLITERATURE\s+CITED\b',   # "LITERATURE CITED"
-        r'\bAcknowledgement(s)?\b',  # 有些文献References前会有致谢
-        r'\bAppendix(es)?\b',        # 附录通常也在最后
-        r'\bSUPPORTING\s+INFORMATION\b', # 某些期刊的补充信息
-        r'\bSUPPLEMENTARY\s+MATERIALS?\b', # 补充材料
-    ]
-
-    # 将所有模式组合成一个大的正则表达式，并编译以提高效率
-    combined_pattern = re.compile(r'|'.join(reference_patterns), re.IGNORECASE)
-
-    # 从文本末尾开始向前查找，或者直接从头开始查找第一个匹配
-    # 因为 References 通常在文档的末尾，我们假设找到的第一个匹配就是它
-    match = combined_pattern.search(text)
+    # 因为 References 通常在文档的末尾，只扫描文本的末尾部分 (O(tail) instead of O(document)),
+    # 我们假设在其中找到的第一个匹配就是它
+    # search() with a start position still sees the preceding character, so \b works at the boundary
+    tail_start = max(0, len(text) - _REF_SEARCH_TAIL_CHARS)
+    match = _REF_HEADER.search(text, tail_start)
 
     if match:
         # 如果找到匹配，截断文本到匹配开始的位置
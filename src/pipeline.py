@@ -0,0 +1,111 @@
+# src/pipeline.py
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try: # Imported as part of the src package
+    from .pdf_parser import extract_text_from_pdf, remove_references_section
+    from .prompt_builder import make_extraction_prompt_fn
+    from .llm_interface import call_llm_for_extraction_async
+except ImportError: # Run with src/ on sys.path
+    from pdf_parser import extract_text_from_pdf, remove_references_section
+    from prompt_builder import make_extraction_prompt_fn
+    from llm_interface import call_llm_for_extraction_async
+
+
+async def pipeline(pdf_paths: list, desired_info: list, examples: list = None,
+                   model_name: str = "gemini-1.5-flash", max_workers: int | None = None,
+                   concurrency: int = 16, force_refresh: bool = False) -> dict:
+    """
+    Extracts the requested information from many PDF files, overlapping PDF parsing
+    (CPU-bound, run in worker processes) with the LLM calls (I/O-bound, awaited in the
+    event loop). Documents are handed from the parse stage to the LLM stage through an
+    asyncio.Queue as soon as they are parsed, so total wall time approaches the slower
+    of the two stages instead of their sum.
+
+    Args:
+        pdf_paths (list): Paths of the PDF files to process.
+        desired_info (list): The information to extract (see build_extraction_prompt).
+        examples (list, optional): Few-shot examples, as in build_extraction_prompt.
+        model_name (str): The specific Gemini model to use.
+        max_workers (int | None): Number of PDF parsing processes. Defaults to os.cpu_count().
+        concurrency (int): Maximum number of LLM requests in flight.
+        force_refresh (bool): If True, bypass the LLM result cache.
+
+    Returns:
+        dict: Maps each path to its parsed LLM result (None if the PDF text could not be
+              extracted or the LLM call failed).
+    """
+    results = {}
+    if not pdf_paths:
+        return results
+
+    # The static part of the prompt is rendered once for the whole job
+    prompt_fn = make_extraction_prompt_fn(desired_info, examples)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=2 * concurrency)
+    # Parsed texts wait in the queue; bounding the parses in flight as well caps the number of
+    # documents held in memory (queued, or parsed and waiting to be queued) while the LLM
+    # stage catches up
+    parse_slots = asyncio.Semaphore(2 * concurrency)
+
+    async def parse_one(executor: ProcessPoolExecutor, path: str) -> None:
+        async with parse_slots:
+            try:
+                text = await loop.run_in_executor(executor, extract_text_from_pdf, path)
+            except Exception as e: # E.g. BrokenProcessPool; other documents still get their results
+                print(f"[Pipeline Error] PDF parsing failed for {path}: {e}")
+                text = None
+            await queue.put((path, text)) # Hand over as soon as this document is parsed
+
+    async def parse_stage(executor: ProcessPoolExecutor) -> None:
+        try:
+            await asyncio.gather(*(parse_one(executor, path) for path in pdf_paths))
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None) # One stop signal per LLM worker, even if parsing was aborted
+
+    async def llm_stage() -> None:
+        while (item := await queue.get()) is not None:
+            path, text = item
+            if not text:
+                print(f"[Pipeline] No text extracted from {path}; skipping LLM call.")
+                results[path] = None
+                continue
+            prompt = prompt_fn(remove_references_section(text))
+            try:
+                results[path] = await call_llm_for_extraction_async(prompt, model_name, force_refresh=force_refresh)
+            except Exception as e:
+                print(f"[Pipeline Error] LLM extraction failed for {path}: {e}")
+                results[path] = None
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        # `concurrency` LLM workers bound the number of simultaneous requests
+        await asyncio.gather(parse_stage(executor), *(llm_stage() for _ in range(concurrency)))
+
+    # Report results in input order
+    return {path: results.get(path) for path in pdf_paths}
+
+
+# --- Example Usage (for testing this module directly) ---
+if __name__ == "__main__":
+    import glob
+    import json
+
+    sample_pdf_paths = sorted(glob.glob(os.path.join("data", "raw_pdfs", "*.pdf")))
+    sample_desired_info = [
+        "Batch Name/ID",
+        "PLGA Molecular Weight (MW; e.g., kDa, Da)",
+        "DLS Size (nm; average diameter)",
+        "Zeta Potential (mV)",
+        "Encapsulation Efficiency (%)",
+    ]
+
+    if not sample_pdf_paths:
+        print("No PDF files found in data/raw_pdfs.")
+    else:
+        extraction_results = asyncio.run(pipeline(sample_pdf_paths, sample_desired_info))
+        for pdf_path, extracted in extraction_results.items():
+            print(f"\n--- {pdf_path} ---")
+            print(json.dumps(extracted, indent=2, ensure_ascii=False))
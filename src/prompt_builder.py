@@ -1,11 +1,306 @@
 # src/prompt_builder.py
+"""
+Prompt construction for PLGA nanoparticle information extraction and validation.
 
+Ordering contract of the extraction prompt (build_extraction_prompt and every variant of it):
+
+    [system][task][desired_info][examples][TEXT TO PROCESS][output instruction]
+
+Everything before the "---BEGIN TEXT TO PROCESS---" marker depends only on
+(desired_info, examples), so it is identical for every prompt of an extraction job; only
+the text to process varies per call. Keeping the varying part at the end maximizes
+prefix-cache hits (provider prompt caching, or prefix KV-cache reuse in vLLM/SGLang-style
+servers). The validation prompt follows the same rule: its static instructions come first.
+Do not move per-call content in front of the marker.
+"""
+
+import hashlib
 import json
 import re 
+from dataclasses import dataclass
+
+try:
+    import orjson # Optional: faster JSON round trip in build_validation_prompt
+except ImportError:
+    orjson = None
+
+# --- Static prompt sections ---
+# These do not depend on the input, so they are built once at import instead of on every call.
+
+# Extraction prompt: System/Role Instruction
+_SYSTEM_INSTRUCTION = (
+    "You are a highly accurate scientific information extraction AI. "
+    "Your task is to meticulously extract specific physicochemical properties, synthesis parameters, "
+    "and characterization data of PLGA nanoparticles from scientific literature. "
+    "You must identify and extract data for ALL distinct nanoparticle formulations or batches found in the text. " # 新增：强调提取所有不同的配方或批次
+    "You must provide output ONLY in the specified JSON format."
+)
+
+# Extraction prompt: separator between the system instruction and the user part in the flat prompt
+# string (build_extraction_prompt); chat messages keep the two apart instead
+_MESSAGE_SEPARATOR = "\n\n"
+
+# Extraction prompt: Task Description
+_TASK_DESCRIPTION = (
+    "From the following scientific text excerpt, identify and extract the exact values "
+    "for the requested information types for EVERY distinct PLGA nanoparticle formulation/batch described. " # 新增：强调每一个不同的配方/批次
+    "Each distinct formulation's data should be an individual JSON object within a JSON array. " # 新增：明确输出是一个JSON数组，每个元素是JSON对象
+    "If a specific piece of information is explicitly stated, provide it. "
+    "If a unit is provided in the text (e.g., nm, mg, mL, %), include it with the value. "
+    "If the information is not found or explicitly stated as 'N/A' in the text, represent it as 'N/A'. "
+    "Do not make assumptions, infer values, or include any extra text or explanations outside the JSON."
+)
+
+# Extraction prompt: Output Instruction
+_OUTPUT_INSTRUCTION = (
+    "Provide ONLY the JSON ARRAY object. Do not include any additional text, " # 新增：强调是JSON ARRAY
+    "comments, or explanations outside the JSON."
+)
+
+# Validation prompt: System/Role Instruction
+_VALIDATION_SYSTEM_INSTRUCTION = (
+    "You are a highly diligent and meticulous scientific data auditor AI. "
+    "Your task is to critically review and validate previously extracted data "
+    "against its original source text. "
+    "You must correct any inaccuracies, fill in missing information if clearly present, "
+    "and set values to 'N/A' if not found or explicitly stated as such in the original text. "
+    "Your final output MUST be a valid JSON array (or object, if input was object), matching the input structure."
+)
+
+# Validation prompt: Task Description
+_VALIDATION_TASK_DESCRIPTION = (
+    "Carefully compare each data point in the 'EXTRACTED DATA (JSON)' section "
+    "with the 'ORIGINAL TEXT CONTENT'. "
+    "For each entry, follow these rules:\n"
+    "1.  **Verify Accuracy:** Is the extracted value (including unit) exactly as stated in the original text? If not, CORRECT it.\n"
+    "2.  **Check Completeness:** If a requested field is 'N/A' in the extracted data, but the information is clearly present in the original text, then EXTRACT and fill in the correct value.\n"
+    "3.  **Handle Missing Data:** If a field has an extracted value, but that value is *not* found or is explicitly 'N/A' in the original text, set the value to 'N/A'.\n"
+    "4.  **Preserve Structure:** The output must be a JSON array (if the input was an array) or a JSON object (if the input was an object), with the same keys as the extracted data. Do not add or remove keys unless absolutely necessary for structural correctness (e.g., if an entire batch was duplicated incorrectly).\n"
+    "5.  **Be Strict:** Do not infer or hallucinate values. Only use information explicitly present in the 'ORIGINAL TEXT CONTENT'.\n"
+    "6.  **Units:** Always include units if provided in the text."
+)
+
+# Markdown fences around LLM JSON output (compiled once at import). Non-greedy, so only the first
+# block is taken when the LLM emits several; the loose variant accepts a fence without "json" tag.
+_JSON_FENCE_RE = re.compile(r'```json\s*\n(.*?)\n```', re.DOTALL)
+_JSON_FENCE_LOOSE_RE = re.compile(r'```[^\S\n]*\n(.*?)\n```', re.DOTALL)
+
+# Batched extraction prompt (build_batched_extraction_prompt): several excerpts share one preamble
+_BATCH_TASK_DESCRIPTION = (
+    "The text to process below consists of several numbered excerpts, each wrapped in "
+    "---BEGIN TEXT [i]--- and ---END TEXT [i]--- markers. "
+    "Process each excerpt independently, exactly as if it were the only text given: "
+    "do not combine information across excerpts."
+)
+
+_BATCH_OUTPUT_INSTRUCTION = (
+    "Provide ONLY a JSON ARRAY with exactly one object per excerpt, in the form "
+    '[{"index": 1, "results": [...]}, {"index": 2, "results": [...]}], '
+    'where "index" is the excerpt number and "results" is the JSON ARRAY of formulations '
+    "extracted from that excerpt (an empty array if it describes none). "
+    "Do not include any additional text, comments, or explanations outside the JSON."
+)
+
+# Adaptive batching (plan_extraction_batches): keep the variable text of a batched prompt under
+# this many characters (~4 characters per token), and cap the number of excerpts per prompt so
+# the combined JSON answer stays well inside the model's output budget.
+DEFAULT_BATCH_TEXT_CHAR_BUDGET = 60_000
+DEFAULT_MAX_BATCH_SIZE = 8
+
+# Rough characters-per-token ratio of English scientific text, for the zero-dependency estimate
+_CHARS_PER_TOKEN = 4
+
+
+@dataclass(frozen=True, slots=True)
+class BuiltPrompt:
+    """A prompt string together with its estimated input token count (see estimate_prompt_tokens)."""
+    text: str
+    approx_tokens: int
+
+
+def estimate_prompt_tokens(prompt: str) -> int:
+    """Cheap estimate of the number of input tokens of `prompt` (about 4 characters per token)."""
+    return len(prompt) // _CHARS_PER_TOKEN
+
+
+def prompt_hash(prompt: str) -> str:
+    """
+    Content hash of a prompt string (blake2b, 128-bit, hex), used as the LLM result cache key
+    (see llm_cache.py). The builders return prompts in one canonical form, so identical inputs
+    always hash identically.
+    """
+    return hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+
+
+def _build_information_list_section(desired_info: list) -> str:
+    """Requested Information List section shared by the extraction prompt builders."""
+    # One join with the bullet in the separator instead of an f-string per item ("" for an empty list)
+    requested_info_str = "- " + "\n- ".join(desired_info) if desired_info else ""
+    return f"Here is the list of information you need to extract for EACH nanoparticle formulation:\n{requested_info_str}" # 新增：强调对每个配方提取
+
+
+def _serialize_example_output(output_json, compact: bool = True) -> str:
+    """
+    JSON text of an example's 'output_json'; a string is taken as already serialized.
+
+    The compact form puts each formulation record of an array on one line without spaces
+    (about a third fewer tokens than indent=2, which mostly adds newlines and indentation),
+    while keeping one record per line so the array structure stays easy to follow.
+    compact=False gives the original indent=2 rendering.
+    """
+    if isinstance(output_json, str):
+        return output_json
+    if not compact:
+        return json.dumps(output_json, indent=2)
+    if isinstance(output_json, list) and output_json:
+        return "[\n" + ",\n".join(json.dumps(record, separators=(',', ':'), ensure_ascii=False) for record in output_json) + "\n]"
+    return json.dumps(output_json, separators=(',', ':'), ensure_ascii=False)
+
+
+def preserialize_examples(examples: list | None, compact: bool = True) -> list | None:
+    """
+    Returns a copy of `examples` whose 'output_json' values are already serialized JSON strings.
+    Few-shot examples are usually fixed for a whole extraction job, so serializing them once
+    up front (e.g. when the configuration is loaded) removes the json.dumps calls from every
+    prompt build. The prompts produced are identical to those built from the original examples.
+
+    Args:
+        examples (list | None): Few-shot examples as accepted by build_extraction_prompt.
+        compact (bool): Serialization form, as in build_extraction_prompt.
+
+    Returns:
+        list | None: The examples with pre-serialized 'output_json', or None if `examples` is None.
+    """
+    if examples is None:
+        return None
+    return [{**example, 'output_json': _serialize_example_output(example['output_json'], compact)} for example in examples]
+
+
+def _build_examples_section(examples: list | None, compact: bool = True) -> str:
+    """Few-shot examples section, or "" when there are no examples."""
+    if not examples:
+        return ""
+    # Collect the example blocks and join once instead of growing a string with +=
+    example_blocks = [
+        f"---BEGIN EXAMPLE---\nTEXT:\n{example['input_text']}\n"
+        # 确保这里的 output_json 是一个 JSON 数组的字符串表示
+        f"OUTPUT:\n{_serialize_example_output(example['output_json'], compact)}\n---END EXAMPLE---"
+        for example in examples
+    ]
+    return (
+        "Here are some examples of input text and their corresponding expected JSON ARRAY output:\n" # 新增：强调是JSON ARRAY输出
+        + "\n\n".join(example_blocks)
+    )
+
+
+def _build_static_preamble(desired_info: list, examples: list | None, compact: bool = True) -> str:
+    """
+    The part of the user message that does not depend on the text to process
+    (task description, requested information list and few-shot examples).
+    """
+
+    # --- 1. System/Role Instruction and 2. Task Description: see _SYSTEM_INSTRUCTION / _TASK_DESCRIPTION ---
+
+    # --- 3. Requested Information List ---
+    information_list_section = _build_information_list_section(desired_info)
+
+
+    # --- 4. Few-shot Examples (Crucial for Multiple Entries) ---
+    examples_section = _build_examples_section(examples, compact)
+
+    # Assembled with a single join (one allocation) rather than chained concatenation
+    preamble_sections = [_TASK_DESCRIPTION, information_list_section]
+    if examples_section:
+        preamble_sections.append(examples_section)
+    return "\n\n".join(preamble_sections) + "\n\n"
+
+
+def _iter_variable_part(text_content: str):
+    """Yields the pieces of the per-document part: the text to process and the output instruction."""
+
+    # --- 5. The Actual Text Content to Process ---
+    yield "---BEGIN TEXT TO PROCESS---\nTEXT:\n"
+    yield text_content
+    yield "\n---END TEXT TO PROCESS---\n\n"
+
+    # --- 6. Output Instruction ---
+    yield _OUTPUT_INSTRUCTION
+    yield "\n"
+
+
+def _build_variable_part(text_content: str) -> str:
+    """The per-document part of the user message: the text to process and the output instruction."""
+    return "".join(_iter_variable_part(text_content))
+
+
+def build_extraction_messages(text_content: str, desired_info: list, examples: list = None, compact: bool = True) -> list:
+    """
+    Constructs the extraction prompt as structured chat messages with explicit prompt-caching
+    breakpoints. Everything except the text to process is static across documents, so it is
+    placed first and marked with "cache_control"; providers with prompt caching (e.g.
+    anthropic.messages.create) can then serve that prefix from cache and bill it at a reduced
+    rate. The system text, a blank line (_MESSAGE_SEPARATOR) and the user texts concatenate to
+    exactly the build_extraction_prompt string, which is built from these messages.
+
+    Args:
+        text_content (str): The document excerpt from which to extract information.
+        desired_info (list): The information to extract, as in build_extraction_prompt.
+        examples (list, optional): Few-shot examples, as in build_extraction_prompt.
+        compact (bool): Example output rendering, as in build_extraction_prompt.
+
+    Returns:
+        list: [system message, user message]; the user message content holds the cached
+              preamble (task, requested information, examples) and then the variable text part.
+    """
+    return [
+        {"role": "system", "content": [
+            {"type": "text", "text": _SYSTEM_INSTRUCTION, "cache_control": {"type": "ephemeral"}},
+        ]},
+        {"role": "user", "content": [
+            {"type": "text", "text": _build_static_preamble(desired_info, examples, compact), "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": _build_variable_part(text_content)},
+        ]},
+    ]
+
+
+def _join_message_texts(messages: list) -> str:
+    """The flat prompt of build_extraction_messages' messages: the system text, then the user texts."""
+    system_message, user_message = messages
+    return (system_message["content"][0]["text"] + _MESSAGE_SEPARATOR
+            + "".join(part["text"] for part in user_message["content"]))
+
+
+def make_extraction_prompt_fn(desired_info: list, examples: list = None, compact: bool = True):
+    """
+    Returns a function building extraction prompts for a fixed `desired_info` and `examples`.
+    The static part of the prompt is rendered once here, so each call of the returned function
+    only formats the text to process. Use this when building prompts for many excerpts of an
+    extraction job; the prompts are identical to those of build_extraction_prompt.
 
-def build_extraction_prompt(text_content: str, desired_info: list, examples: list = None) -> str:
+    Args:
+        desired_info (list): The information to extract, as in build_extraction_prompt.
+        examples (list, optional): Few-shot examples, as in build_extraction_prompt.
+        compact (bool): Example output rendering, as in build_extraction_prompt.
+
+    Returns:
+        Callable[[str], str]: Maps a text_content to its full extraction prompt.
+    """
+    # The same static texts as build_extraction_messages, joined as in _join_message_texts
+    prompt_prefix = _SYSTEM_INSTRUCTION + _MESSAGE_SEPARATOR + _build_static_preamble(desired_info, examples, compact)
+
+    def build(text_content: str) -> str:
+        return prompt_prefix + _build_variable_part(text_content)
+
+    build.prompt_prefix = prompt_prefix # The static part, shared by every prompt of this function
+    return build
+
+
+def build_extraction_prompt(text_content: str, desired_info: list, examples: list = None, compact: bool = True) -> str:
     """
     Constructs a comprehensive prompt for an LLM to extract specific information from text.
+    This is the flat-string form of build_extraction_messages. For many excerpts of one
+    extraction job, build the prompt function once with make_extraction_prompt_fn instead,
+    so the static part of the prompt is not rendered again for every excerpt.
 
     Args:
         text_content (str): The document excerpt (e.g., abstract, body paragraph, table text)
@@ -15,181 +310,277 @@ def build_extraction_prompt(text_content: str, desired_info: list, examples: lis
                              should be detailed to guide the LLM on what to look for.
         examples (list, optional): A list of dictionaries, where each dict contains
                                    'input_text' and 'output_json' for few-shot learning.
-                                   Defaults to None.
+                                   'output_json' may also be a pre-serialized JSON string
+                                   (see preserialize_examples). Defaults to None.
+        compact (bool): If True (default), example outputs are rendered as compact JSON with
+                        one record per line, which needs markedly fewer input tokens. Set it
+                        to False for the more readable indent=2 rendering.
 
     Returns:
         str: The full prompt string ready to be sent to the LLM.
     """
+    return _join_message_texts(build_extraction_messages(text_content, desired_info, examples, compact))
 
-    # --- 1. System/Role Instruction ---
-    system_instruction = (
-        "You are a highly accurate scientific information extraction AI. "
-        "Your task is to meticulously extract specific physicochemical properties, synthesis parameters, "
-        "and characterization data of PLGA nanoparticles from scientific literature. "
-        "You must identify and extract data for ALL distinct nanoparticle formulations or batches found in the text. " # 新增：强调提取所有不同的配方或批次
-        "You must provide output ONLY in the specified JSON format."
-    )
 
-    # --- 2. Task Description ---
-    task_description = (
-        "From the following scientific text excerpt, identify and extract the exact values "
-        "for the requested information types for EVERY distinct PLGA nanoparticle formulation/batch described. " # 新增：强调每一个不同的配方/批次
-        "Each distinct formulation's data should be an individual JSON object within a JSON array. " # 新增：明确输出是一个JSON数组，每个元素是JSON对象
-        "If a specific piece of information is explicitly stated, provide it. "
-        "If a unit is provided in the text (e.g., nm, mg, mL, %), include it with the value. "
-        "If the information is not found or explicitly stated as 'N/A' in the text, represent it as 'N/A'. "
-        "Do not make assumptions, infer values, or include any extra text or explanations outside the JSON."
-    )
+def build_extraction_prompts(text_contents: list, desired_info: list, examples: list = None, compact: bool = True) -> list:
+    """
+    Builds the extraction prompts of many excerpts sharing one (desired_info, examples), each
+    with its estimated token count, so a scheduler can group prompts of similar length
+    (see group_prompts_by_length) before dispatching them.
 
-    # --- 3. Requested Information List ---
-    requested_info_str = "\n".join([f"- {info}" for info in desired_info])
-    information_list_section = f"Here is the list of information you need to extract for EACH nanoparticle formulation:\n{requested_info_str}" # 新增：强调对每个配方提取
+    Args:
+        text_contents (list): The document excerpts to process.
+        desired_info (list): The information to extract, as in build_extraction_prompt.
+        examples (list, optional): Few-shot examples, as in build_extraction_prompt.
+        compact (bool): Example output rendering, as in build_extraction_prompt.
 
+    Returns:
+        list[BuiltPrompt]: One prompt per excerpt, in the same order as `text_contents`.
+    """
+    prompt_fn = make_extraction_prompt_fn(desired_info, examples, compact)
+    built_prompts = []
+    for text_content in text_contents:
+        prompt = prompt_fn(text_content)
+        built_prompts.append(BuiltPrompt(prompt, estimate_prompt_tokens(prompt)))
+    return built_prompts
 
-    # --- 4. Few-shot Examples (Crucial for Multiple Entries) ---
-    examples_section = ""
-    if examples:
-        examples_section = "Here are some examples of input text and their corresponding expected JSON ARRAY output:\n" # 新增：强调是JSON ARRAY输出
-        for example in examples:
-            examples_section += f"---BEGIN EXAMPLE---\nTEXT:\n{example['input_text']}\n"
-            # 确保这里的 output_json 是一个 JSON 数组的字符串表示
-            examples_section += f"OUTPUT:\n{json.dumps(example['output_json'], indent=2)}\n---END EXAMPLE--...\n\n" # 新增：提示可能还有更多示例
 
-        examples_section = examples_section.strip() + "\n\n"
+def group_prompts_by_length(prompts: list, bin_size: int) -> list:
+    """
+    Sorts prompts by estimated length and splits them into bins of at most `bin_size`, so each
+    bin holds prompts of similar length (less padding and fewer stragglers per batch).
 
+    Args:
+        prompts (list[BuiltPrompt]): Prompts built by build_extraction_prompts.
+        bin_size (int): Maximum number of prompts per bin.
 
-    # --- 5. The Actual Text Content to Process ---
-    text_content_section = f"---BEGIN TEXT TO PROCESS---\nTEXT:\n{text_content}\n---END TEXT TO PROCESS---"
+    Returns:
+        list[list[BuiltPrompt]]: The bins, from the shortest prompts to the longest.
+    """
+    sorted_prompts = sorted(prompts, key=lambda p: p.approx_tokens)
+    return [sorted_prompts[i:i + bin_size] for i in range(0, len(sorted_prompts), bin_size)]
 
-    # --- 6. Output Instruction ---
-    output_instruction = (
-        "Provide ONLY the JSON ARRAY object. Do not include any additional text, " # 新增：强调是JSON ARRAY
-        "comments, or explanations outside the JSON."
-    )
 
-    # --- Combine all parts into the final prompt ---
-    full_prompt = (
-        f"{system_instruction}\n\n"
-        f"{task_description}\n\n"
-        f"{information_list_section}\n\n"
-        f"{examples_section}"
-        f"{text_content_section}\n\n"
-        f"{output_instruction}\n"
-    )
+async def abuild_extraction_prompts(text_contents, desired_info: list, examples: list = None, compact: bool = True):
+    """
+    Asynchronous generator of extraction prompts, one per excerpt, all sharing one static
+    preamble rendered up front (see make_extraction_prompt_fn). Pass it straight to llm_interface.call_llm_batch,
+    which pulls the next prompt only when a request slot is free, so prompts are built at the
+    rate the LLM consumes them.
 
-    return full_prompt
+    Args:
+        text_contents: The document excerpts, as an iterable or an async iterable (e.g. excerpts
+                       produced by an upstream parsing stage).
+        desired_info (list): The information to extract, as in build_extraction_prompt.
+        examples (list, optional): Few-shot examples, as in build_extraction_prompt.
+        compact (bool): Example output rendering, as in build_extraction_prompt.
+
+    Yields:
+        str: The extraction prompt of the next excerpt.
+    """
+    prompt_fn = make_extraction_prompt_fn(desired_info, examples, compact)
+    if hasattr(text_contents, "__aiter__"):
+        async for text_content in text_contents:
+            yield prompt_fn(text_content)
+    else:
+        for text_content in text_contents:
+            yield prompt_fn(text_content)
 
 
-def build_validation_prompt(original_text_content: str, extracted_json_string: str) -> str:
+def iter_extraction_prompt_sections(text_content: str, desired_info: list, examples: list = None, compact: bool = True,
+                                    prompt_fn=None):
     """
-    Constructs a prompt for an LLM to validate and correct previously extracted JSON data
-    against the original text content.
+    Lazily yields the extraction prompt as consecutive string sections, without ever building
+    the concatenated prompt; "".join() of the sections equals build_extraction_prompt(...).
+    The static prefix is yielded as one string (pass `prompt_fn` to reuse it across calls)
+    and text_content is yielded as-is, so nothing proportional to the document is copied.
+    Senders that accept an iterable body (e.g. httpx streaming uploads) or tokenizers that
+    encode in chunks can consume the sections directly.
 
     Args:
-        original_text_content (str): The original document excerpt (the source of truth).
-        extracted_json_string (str): The JSON string of the data previously extracted by an LLM.
+        text_content (str): The document excerpt from which to extract information.
+        desired_info (list): The information to extract, as in build_extraction_prompt.
+        examples (list, optional): Few-shot examples, as in build_extraction_prompt.
+        compact (bool): Example output rendering, as in build_extraction_prompt.
+        prompt_fn (optional): The make_extraction_prompt_fn(desired_info, examples, compact)
+                              result of the extraction job; its prefix is then used as-is.
+
+    Yields:
+        str: The next section of the prompt.
+    """
+    if prompt_fn is None:
+        prompt_fn = make_extraction_prompt_fn(desired_info, examples, compact)
+    yield prompt_fn.prompt_prefix
+    yield from _iter_variable_part(text_content)
+
+
+def build_batched_extraction_prompt(text_contents: list, desired_info: list, examples: list = None, compact: bool = True) -> str:
+    """
+    Constructs one extraction prompt for several document excerpts, so the shared preamble
+    (instructions, requested information list and few-shot examples) is sent and billed once
+    per batch instead of once per excerpt. Each excerpt is numbered from 1; the LLM answers
+    with one {"index": i, "results": [...]} object per excerpt, which
+    split_batched_extraction_results maps back to the excerpts.
+
+    Args:
+        text_contents (list): The document excerpts to process (see plan_extraction_batches
+                              for choosing how many to put in one prompt).
+        desired_info (list): The information to extract, as in build_extraction_prompt.
+        examples (list, optional): Single-excerpt few-shot examples, as in build_extraction_prompt.
+                                   Their OUTPUT shows the "results" value of one excerpt.
+        compact (bool): Example output rendering, as in build_extraction_prompt.
 
     Returns:
-        str: The full validation prompt string ready to be sent to the LLM.
+        str: The full batched prompt string ready to be sent to the LLM.
     """
+    information_list_section = _build_information_list_section(desired_info)
+    examples_section = _build_examples_section(examples, compact)
 
-    system_instruction = (
-        "You are a highly diligent and meticulous scientific data auditor AI. "
-        "Your task is to critically review and validate previously extracted data "
-        "against its original source text. "
-        "You must correct any inaccuracies, fill in missing information if clearly present, "
-        "and set values to 'N/A' if not found or explicitly stated as such in the original text. "
-        "Your final output MUST be a valid JSON array (or object, if input was object), matching the input structure."
-    )
+    text_blocks = [
+        f"---BEGIN TEXT [{i}]---\nTEXT:\n{text_content}\n---END TEXT [{i}]---"
+        for i, text_content in enumerate(text_contents, start=1)
+    ]
+    text_content_section = "---BEGIN TEXTS TO PROCESS---\n" + "\n\n".join(text_blocks) + "\n---END TEXTS TO PROCESS---"
 
-    task_description = (
-        "Carefully compare each data point in the 'EXTRACTED DATA (JSON)' section "
-        "with the 'ORIGINAL TEXT CONTENT'. "
-        "For each entry, follow these rules:\n"
-        "1.  **Verify Accuracy:** Is the extracted value (including unit) exactly as stated in the original text? If not, CORRECT it.\n"
-        "2.  **Check Completeness:** If a requested field is 'N/A' in the extracted data, but the information is clearly present in the original text, then EXTRACT and fill in the correct value.\n"
-        "3.  **Handle Missing Data:** If a field has an extracted value, but that value is *not* found or is explicitly 'N/A' in the original text, set the value to 'N/A'.\n"
-        "4.  **Preserve Structure:** The output must be a JSON array (if the input was an array) or a JSON object (if the input was an object), with the same keys as the extracted data. Do not add or remove keys unless absolutely necessary for structural correctness (e.g., if an entire batch was duplicated incorrectly).\n"
-        "5.  **Be Strict:** Do not infer or hallucinate values. Only use information explicitly present in the 'ORIGINAL TEXT CONTENT'.\n"
-        "6.  **Units:** Always include units if provided in the text."
-    )
+    sections = [_SYSTEM_INSTRUCTION, _TASK_DESCRIPTION, _BATCH_TASK_DESCRIPTION, information_list_section]
+    if examples_section:
+        sections.append(examples_section)
+    sections += [text_content_section, _BATCH_OUTPUT_INSTRUCTION]
+    return "\n\n".join(sections) + "\n"
 
-    # Clean the extracted_json_string in case it has markdown fences
-    json_string_to_validate = ""
-    json_match = re.search(r'```json\n(.*)\n```', extracted_json_string, re.DOTALL)
-    if json_match:
-        json_string_to_validate = json_match.group(1).strip()
-    else:
-        json_string_to_validate = extracted_json_string.strip()
-    
+
+def plan_extraction_batches(text_contents: list, char_budget: int = DEFAULT_BATCH_TEXT_CHAR_BUDGET,
+                            max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> list:
+    """
+    Groups consecutive excerpts into batches for build_batched_extraction_prompt. A batch is
+    closed when adding the next excerpt would exceed `char_budget` characters of text or
+    `max_batch_size` excerpts. An excerpt that alone uses half the budget or more always gets a
+    batch of its own; send such single-excerpt batches with build_extraction_prompt, since
+    batching them would risk overflowing the context or the output budget.
+
+    Args:
+        text_contents (list): The document excerpts to process.
+        char_budget (int): Maximum total excerpt length (in characters) of a batched prompt.
+        max_batch_size (int): Maximum number of excerpts in one batched prompt.
+
+    Returns:
+        list: Lists of indices into `text_contents`, covering every excerpt in order.
+    """
+    batches = []
+    current_batch = []
+    current_chars = 0
+    for i, text_content in enumerate(text_contents):
+        text_chars = len(text_content)
+        if text_chars * 2 >= char_budget:
+            # Near the limit on its own: single-prompt mode
+            if current_batch:
+                batches.append(current_batch)
+                current_batch, current_chars = [], 0
+            batches.append([i])
+            continue
+        if current_batch and (current_chars + text_chars > char_budget or len(current_batch) >= max_batch_size):
+            batches.append(current_batch)
+            current_batch, current_chars = [], 0
+        current_batch.append(i)
+        current_chars += text_chars
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+def split_batched_extraction_results(parsed_data, batch_size: int) -> list:
+    """
+    Maps the parsed LLM answer to a batched prompt back to its excerpts.
+
+    Args:
+        parsed_data: The parsed JSON answer, expected to be [{"index": i, "results": [...]}, ...].
+        batch_size (int): Number of excerpts that were in the batched prompt.
+
+    Returns:
+        list: `batch_size` entries, in excerpt order: the "results" of each excerpt, or None for
+              an excerpt missing from the answer (e.g. a truncated response), so that only
+              those excerpts need to be retried.
+    """
+    results = [None] * batch_size
+    if not isinstance(parsed_data, list):
+        print("[Prompt Builder Warning] Batched LLM answer is not a JSON array; no results recovered.")
+        return results
+
+    for entry in parsed_data:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            # Accept 1, "1" and "[1]" as the index of the first excerpt
+            index = int(str(entry.get("index")).strip("[] "))
+        except ValueError:
+            continue
+        if 1 <= index <= batch_size:
+            results[index - 1] = entry.get("results")
+    return results
+
+
+def _reformat_json_for_validation(json_string_to_validate: str) -> str:
+    """
+    Re-renders JSON text with 2-space indentation for the validation prompt, or returns it
+    unchanged (with a warning) if it is not valid JSON. Uses orjson when it is installed.
+    """
     # Ensure it's a string representation of the JSON to be validated
     # This also helps to ensure the LLM outputs the same structure
     # Try to re-dump it to make sure it's consistently formatted for the LLM input
     try:
         # Load and then dump it to ensure it's valid and formatted
+        if orjson is not None:
+            # orjson never escapes non-ASCII, like ensure_ascii=False
+            return orjson.dumps(orjson.loads(json_string_to_validate), option=orjson.OPT_INDENT_2).decode()
         parsed_json_obj = json.loads(json_string_to_validate)
-        formatted_json_for_llm = json.dumps(parsed_json_obj, indent=2, ensure_ascii=False)
-    except json.JSONDecodeError:
+        return json.dumps(parsed_json_obj, indent=2, ensure_ascii=False)
+    except json.JSONDecodeError: # orjson.JSONDecodeError is a subclass
         # If it's not valid JSON, send it as is, but log a warning.
         # This means the initial extraction was problematic.
-        formatted_json_for_llm = json_string_to_validate
         print("[Prompt Builder Warning] Input JSON for validation is not valid JSON. Sending raw string.")
+        return json_string_to_validate
 
 
-    full_prompt = (
-        f"{system_instruction}\n\n"
-        f"{task_description}\n\n"
-        f"--- ORIGINAL TEXT CONTENT ---\nTEXT:\n{original_text_content}\n--- END ORIGINAL TEXT CONTENT ---\n\n"
-        f"--- EXTRACTED DATA (JSON) ---\nJSON:\n{formatted_json_for_llm}\n--- END EXTRACTED DATA ---\n\n"
-        "Please provide ONLY the validated JSON ARRAY (or object) output. Do not include any additional text, comments, or explanations."
-    )
-
-    return full_prompt
+def build_validation_prompt(original_text_content: str, extracted_json_string: str) -> str:
+    """
+    Constructs a prompt for an LLM to validate and correct previously extracted JSON data
+    against the original text content.
 
-# --- You can add an example to the if __name__ == "__main__": block for testing ---
-if __name__ == "__main__":
-    # ... (existing build_extraction_prompt examples) ...
+    Args:
+        original_text_content (str): The original document excerpt (the source of truth).
+        extracted_json_string (str): The JSON string of the data previously extracted by an LLM.
 
-    print("\n" + "="*80 + "\n")
-    print("--- TESTING build_validation_prompt ---")
+    Returns:
+        str: The full validation prompt string ready to be sent to the LLM.
+    """
 
-    # Example original text
-    original_validation_text = (
-        "Batch X used 50 kDa PLGA and had a size of 155 nm (DLS) and -20 mV zeta potential. "
-        "Encapsulation efficiency was 91.5%. Batch Y (75 kDa PLGA) had 200 nm size. "
-        "A PDI of 0.15 was observed for Batch X."
-    )
+    # Clean the extracted_json_string in case it has markdown fences
+    json_string_to_validate = ""
+    json_match = None
+    if "```" in extracted_json_string: # Cheap test first: raw JSON (the common case) skips both regex scans
+        json_match = _JSON_FENCE_RE.search(extracted_json_string) or _JSON_FENCE_LOOSE_RE.search(extracted_json_string)
+    if json_match:
+        json_string_to_validate = json_match.group(1).strip()
+    else:
+        json_string_to_validate = extracted_json_string.strip()
 
-    # Example of initially extracted (potentially flawed) JSON
-    initial_extracted_json = """
-    [
-      {
-        "Batch Name/ID": "Batch X",
-        "PLGA Molecular Weight (MW; e.g., kDa, Da)": "50 kDa",
-        "DLS Size (nm; average diameter)": "150 nm",
-        "Zeta Potential (mV)": "-20 mV",
-        "PDI (Polydispersity Index)": "N/A",
-        "Encapsulation Efficiency (%)": "91%",
-        "Notes": "Some extra info not requested"
-      },
-      {
-        "Batch Name/ID": "Batch Y",
-        "PLGA Molecular Weight (MW; e.g., kDa, Da)": "75 kDa",
-        "DLS Size (nm; average diameter)": "200 nm",
-        "Zeta Potential (mV)": "N/A",
-        "PDI (Polydispersity Index)": "N/A",
-        "Encapsulation Efficiency (%)": "N/A"
-      }
-    ]
-    """
-    
-    validation_prompt = build_validation_prompt(original_validation_text, initial_extracted_json)
-    print(validation_prompt)
+    if json_match is None and json_string_to_validate.startswith(("[", "{")) and json_string_to_validate.endswith(("]", "}")):
+        # Fast path: unfenced output that is already structurally a JSON array/object is sent
+        # as-is, skipping a full parse + re-render that dominates the cost on large arrays
+        formatted_json_for_llm = json_string_to_validate
+    else:
+        formatted_json_for_llm = _reformat_json_for_validation(json_string_to_validate)
 
-    # Note: To actually run this validation prompt, you'd need to send it via llm_interface.py
-    # and then parse the corrected JSON output.
 
+    full_prompt = "\n\n".join([
+        _VALIDATION_SYSTEM_INSTRUCTION,
+        _VALIDATION_TASK_DESCRIPTION,
+        f"--- ORIGINAL TEXT CONTENT ---\nTEXT:\n{original_text_content}\n--- END ORIGINAL TEXT CONTENT ---",
+        f"--- EXTRACTED DATA (JSON) ---\nJSON:\n{formatted_json_for_llm}\n--- END EXTRACTED DATA ---",
+        "Please provide ONLY the validated JSON ARRAY (or object) output. Do not include any additional text, comments, or explanations.",
+    ])
 
+    return full_prompt
 
 # --- Example Usage (for testing this module directly) ---
 if __name__ == "__main__":
@@ -244,4 +635,50 @@ if __name__ == "__main__":
         examples=few_shot_examples_multiple
     )
     print("--- PROMPT FOR MULTIPLE NANOPARTICLE ENTRIES ---")
-    print(prompt_for_multiple)
\ No newline at end of file
+    print(prompt_for_multiple)
+
+    # The ordering contract: the prompt prefix before the text marker is the same for
+    # every prompt built with the same (desired_info, examples)
+    other_prompt = build_extraction_prompt("Batch C had a size of 90 nm.", desired_info_list, few_shot_examples_multiple)
+    prefix_hashes = {prompt_hash(p.split("---BEGIN TEXT TO PROCESS---")[0]) for p in (prompt_for_multiple, other_prompt)}
+    assert len(prefix_hashes) == 1, "Static prompt prefix differs between calls"
+    print(f"\n--- Static prompt prefix is shared across calls (hash {prefix_hashes.pop()}) ---")
+
+    print("\n" + "="*80 + "\n")
+    print("--- TESTING build_validation_prompt ---")
+
+    # Example original text
+    original_validation_text = (
+        "Batch X used 50 kDa PLGA and had a size of 155 nm (DLS) and -20 mV zeta potential. "
+        "Encapsulation efficiency was 91.5%. Batch Y (75 kDa PLGA) had 200 nm size. "
+        "A PDI of 0.15 was observed for Batch X."
+    )
+
+    # Example of initially extracted (potentially flawed) JSON
+    initial_extracted_json = """
+    [
+      {
+        "Batch Name/ID": "Batch X",
+        "PLGA Molecular Weight (MW; e.g., kDa, Da)": "50 kDa",
+        "DLS Size (nm; average diameter)": "150 nm",
+        "Zeta Potential (mV)": "-20 mV",
+        "PDI (Polydispersity Index)": "N/A",
+        "Encapsulation Efficiency (%)": "91%",
+        "Notes": "Some extra info not requested"
+      },
+      {
+        "Batch Name/ID": "Batch Y",
+        "PLGA Molecular Weight (MW; e.g., kDa, Da)": "75 kDa",
+        "DLS Size (nm; average diameter)": "200 nm",
+        "Zeta Potential (mV)": "N/A",
+        "PDI (Polydispersity Index)": "N/A",
+        "Encapsulation Efficiency (%)": "N/A"
+      }
+    ]
+    """
+    
+    validation_prompt = build_validation_prompt(original_validation_text, initial_extracted_json)
+    print(validation_prompt)
+
+    # Note: To actually run this validation prompt, you'd need to send it via llm_interface.py
+    # and then parse the corrected JSON output.
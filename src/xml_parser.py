@@ -1,9 +1,168 @@
 # src/xml_parser.py
 
 from lxml import etree
+from concurrent.futures import ProcessPoolExecutor
+import codecs
+import copy
+import functools
+import hashlib
 import os
+import pickle
 import re
 
+# --- Precompiled cleanup patterns (built once at import instead of per call / per paragraph) ---
+# Headers of reference/ancillary sections; everything from such a header on is dropped.
+# The headers are a fixed set of titles, so a paragraph is classified by one set lookup on its
+# lowercased text instead of a regex scan. Paragraphs longer than the longest title are
+# rejected by their length alone (the callers pass whitespace-normalized paragraphs).
+_ANCILLARY_TITLES = frozenset({
+    'reference', 'references', 'bibliography', 'literature cited',
+    'acknowledgement', 'acknowledgements', 'appendix', 'appendixes',
+    'supporting information', 'supplementary material', 'supplementary materials',
+    'note on contributor', 'note on contributors', 'notes on contributor', 'notes on contributors',
+    'author contribution', 'author contributions', 'funding',
+    'conflict of interest', 'conflicts of interest', 'data availability statement', 'orcid',
+})
+_ANCILLARY_TITLE_MAX_CHARS = max(map(len, _ANCILLARY_TITLES))
+_NUMERIC_ONLY = re.compile(r'^\s*\d+\.?\s*$') # Lone (page/list) numbers
+
+# Block elements that JATS allows inside a <p>; their text is not part of the enclosing paragraph
+_NESTED_BLOCK_TAGS = frozenset({'p', 'list', 'def-list', 'table-wrap', 'fig', 'disp-quote', 'boxed-text'})
+
+# --- Precompiled XPath expressions (compiled once at import, evaluated per document / element) ---
+# The document-wide lookups use descendant-or-self:: so that they can be evaluated on the whole
+# document (equivalent to //...) as well as on a single subtree when streaming (_iter_stream_units).
+_ARTICLE_TITLE_XPATH = etree.XPath('descendant-or-self::article-title/text()')
+_TITLE_XPATH = etree.XPath('descendant-or-self::title/text()')
+_CONTRIB_AUTHOR_XPATH = etree.XPath('descendant-or-self::contrib[@contrib-type="author"]/name')
+_AUTHOR_XPATH = etree.XPath('descendant-or-self::author')
+_ABSTRACT_P_XPATH = etree.XPath('descendant-or-self::abstract//p')
+_ABSTRACT_XPATH = etree.XPath('descendant-or-self::abstract')
+_KEYWORD_XPATH = etree.XPath('descendant-or-self::kwd-group/kwd/text()')
+_SEC_TITLE_XPATH = etree.XPath('./title/text()')
+_TABLE_WRAP_XPATH = etree.XPath('descendant-or-self::table-wrap')
+_CAPTION_P_XPATH = etree.XPath('./caption//p')
+_THEAD_ROW_XPATH = etree.XPath('.//thead/tr')
+_TBODY_ROW_XPATH = etree.XPath('.//tbody/tr')
+
+# --- Parser configuration (shared by the in-memory and the streaming parse) ---
+# No ID index (never used), no DTD or network access and no entity expansion (also keeps
+# untrusted files from pulling in external resources), and recovery from minor markup errors
+# common in real-world JATS files. Comments and processing instructions are dropped while
+# parsing: fewer nodes to walk, and the text around them becomes a single text node.
+# Blank text nodes are kept: they separate inline elements in mixed content,
+# e.g. "<italic>in</italic> <italic>vitro</italic>".
+_PARSER_OPTIONS = dict(collect_ids=False, huge_tree=True, recover=True,
+                       resolve_entities=False, load_dtd=False, no_network=True,
+                       remove_comments=True, remove_pis=True)
+_PARSER = etree.XMLParser(**_PARSER_OPTIONS)
+# Number of leading bytes checked by _looks_like_xml before a file is parsed
+_SNIFF_BYTES = 512
+# Files smaller than this are read whole and parsed from bytes; larger ones are parsed from
+# the file, so their raw bytes are not held in memory next to the tree
+_READ_WHOLE_MAX_BYTES = 8 * 1024 * 1024
+
+# Files at least this large are parsed incrementally (see _iter_stream_units), so peak memory
+# stays proportional to the largest top-level section instead of to the whole document
+XML_STREAM_PARSE_MIN_BYTES = int(os.getenv("XML_STREAM_PARSE_MIN_BYTES", str(64 * 1024 * 1024)))
+
+# Number of extraction results kept in the in-process cache (keyed by path, mtime and size).
+# Each holds a whole document's text and tables, so only recently used files are kept.
+XML_MEMORY_CACHE_SIZE = int(os.getenv("XML_MEMORY_CACHE_SIZE", "64"))
+
+# If "1", extraction results are also pickled beside each XML file (<file>.extracted.pkl) and
+# reused by later runs while the file is unchanged. Off by default: it writes into the data
+# directory, and pickles must only be loaded from trusted locations.
+XML_PICKLE_CACHE = os.getenv("XML_PICKLE_CACHE", "0") == "1"
+_PICKLE_SUFFIX = ".extracted.pkl"
+
+# If set, the pickled results are kept in this directory instead of beside the XML files
+# (which may then be read-only); setting it also enables the pickle cache
+XML_PICKLE_CACHE_DIR = os.getenv("XML_PICKLE_CACHE_DIR")
+if XML_PICKLE_CACHE_DIR:
+    XML_PICKLE_CACHE = True
+
+def _row_cells(row) -> list:
+    """
+    Returns the whitespace-normalized text of each <td>/<th> cell of a table row. itertext()
+    collects the text inside child elements too (e.g. <italic>, <sub>), and an empty cell
+    still yields '' so the columns stay aligned. Line breaks inside a cell are collapsed, as
+    they would otherwise break the row of the markdown table (as in html_parser.py).
+    """
+    return [' '.join("".join(cell.itertext()).split()) for cell in row.iterchildren('td', 'th')]
+
+
+def _paragraph_text(p) -> str:
+    """
+    Text of a <p> element, keeping the text of inline markup (<italic>, <xref>, <sub>, ...) so
+    each paragraph is one string instead of fragments cut at every inline element. Nested blocks
+    (see _NESTED_BLOCK_TAGS) are left out, with a space in their place, since their paragraphs
+    are extracted on their own.
+    """
+    parts = [p.text or ""]
+    for child in p:
+        if child.tag in _NESTED_BLOCK_TAGS:
+            parts.append(" ")
+        else:
+            parts.extend(child.itertext())
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+def _collect_section_texts(element, texts: list, sections: list) -> None:
+    """
+    Single structural walk over `element` (a <body> child or any element below it) doing the work
+    of `.//body//sec` plus `.//p[not(ancestor::ref-list)]` for every section, without re-scanning
+    nested sections: appends the text of its <p> elements (outside ref-lists) to `texts` in
+    document order, and appends (sec_element, paragraph_texts) for every <sec> at or below
+    `element` to `sections`, in document order. A section's paragraph_texts include those of
+    its nested sections, as before.
+    """
+    tag = element.tag
+    if tag == 'ref-list':
+        return
+    if tag == 'sec':
+        slot = len(sections)
+        sections.append(None) # Reserve the slot so outer sections precede nested ones
+        sec_texts = []
+        for child in element:
+            _collect_section_texts(child, sec_texts, sections)
+        sections[slot] = (element, sec_texts)
+        texts.extend(sec_texts)
+        return
+    if tag == 'p':
+        texts.append(_paragraph_text(element))
+        # Only the nested blocks are walked further: their paragraphs (list items, captions,
+        # quotes) follow as paragraphs of their own, while the inline text is already taken
+        for child in element:
+            if child.tag in _NESTED_BLOCK_TAGS:
+                _collect_section_texts(child, texts, sections)
+        return
+    for child in element:
+        _collect_section_texts(child, texts, sections)
+
+
+def _body_sections(element, in_body: bool) -> list:
+    """(sec_element, paragraph_texts) of the body sections at or below `element`, in document order."""
+    sections = []
+    ignored_texts = [] # Paragraphs outside any section are not part of a section
+    if in_body:
+        _collect_section_texts(element, ignored_texts, sections)
+    else:
+        for body in element.iter('body'):
+            if next(body.iterancestors('body'), None) is None: # Nested bodies are covered by the outer one
+                for child in body:
+                    _collect_section_texts(child, ignored_texts, sections)
+    return sections
+
+def _normalize_texts(texts: list) -> list:
+    """
+    Collapses whitespace runs and strips every text, dropping blank ones. str.split() with no
+    separator is equivalent to re.sub(r'\s+', ' ', t).strip() but runs without the regex engine.
+    """
+    return [normalized for normalized in (' '.join(t.split()) for t in texts) if normalized]
+
+
 # --- Helper Function: _remove_references_from_paragraphs (保持不变) ---
 def _remove_references_from_paragraphs(paragraphs: list) -> list:
     """
@@ -13,28 +172,306 @@ def _remove_references_from_paragraphs(paragraphs: list) -> list:
     """
     if not paragraphs:
         return []
-    reference_section_patterns = [
-        r'^\s*References?\s*$', r'^\s*BIBLIOGRAPHY\s*$', r'^\s*LITERATURE\s+CITED\s*$',
-        r'^\s*Acknowledgement(s)?\s*$', r'^\s*Appendix(es)?\s*$', r'^\s*SUPPORTING\s+INFORMATION\s*$',
-        r'^\s*SUPPLEMENTARY\s+MATERIALS?\s*$', r'^\s*Note(s)?\s+on\s+Contributor(s)?\s*$',
-        r'^\s*AUTHOR\s+CONTRIBUTIONS?\s*$', r'^\s*FUNDING\s*$', r'^\s*CONFLICTS?\s+OF\s+INTEREST\s*$',
-        r'^\s*DATA\s+AVAILABILITY\s+STATEMENT\s*$', r'^\s*ORCID\s*$',
-    ]
-    in_ancillary_section = False
-    processed_paragraphs = []
+    # Single pass: paragraphs are dropped from the first ancillary header on, and short or
+    # numeric-only ones are filtered in the same loop (no intermediate list)
+    is_numeric_only = _NUMERIC_ONLY.fullmatch # Its pattern allows surrounding whitespace, so no strip() is needed
+    final_cleaned_paragraphs = []
     for p in paragraphs:
-        is_ancillary_header = any(re.fullmatch(pattern, p, re.IGNORECASE) for pattern in reference_section_patterns)
-        if is_ancillary_header:
-            in_ancillary_section = True
+        if len(p) <= _ANCILLARY_TITLE_MAX_CHARS and ' '.join(p.lower().split()) in _ANCILLARY_TITLES:
+            break # Everything after the header belongs to the ancillary section(s)
+        if len(p) > 20 and not is_numeric_only(p):
+            final_cleaned_paragraphs.append(p)
+    return final_cleaned_paragraphs
+
+
+def _format_author(author_elem) -> str | None:
+    """'Given-names Surname' of a <name>/<author> element, its own text, or None."""
+    # Direct-child lookups: the name parts are plain children with text content
+    surname = author_elem.find('surname')
+    given_names = author_elem.find('given-names')
+    if surname is not None and surname.text and given_names is not None and given_names.text:
+        return f"{given_names.text.strip()} {surname.text.strip()}"
+    elif author_elem.text:
+        return author_elem.text.strip()
+    return None
+
+
+def _new_candidates() -> dict:
+    """
+    Values gathered by _collect_from_element that can only be resolved once the whole document
+    has been seen (a fallback is used only if the preferred source is absent everywhere).
+    """
+    return {
+        'article_titles': [], 'titles': [],
+        'contrib_authors': [], 'fallback_authors': [],
+        'abstract_paragraphs': [], 'abstract_texts': [],
+        'body_paragraphs': [],
+        'has_front': False, # Set once a <front> has been seen (see _front_matter_scope)
+    }
+
+
+def _front_matter_scope(element, candidates: dict):
+    """
+    The part of `element` searched for the front matter (title, authors, abstract, keywords).
+    In a JATS article that is <front> only, so the much larger body and back (e.g. the
+    <article-title> of every reference) are never scanned for it; documents without a
+    <front> are searched whole. When streaming, None for the units after a <front>.
+    """
+    if element.getparent() is None: # The whole document
+        front = element.find('front')
+        return element if front is None else front
+    if element.tag == 'front':
+        candidates['has_front'] = True
+        return element
+    return None if candidates['has_front'] else element
+
+
+def _collect_from_element(element, extracted_data: dict, candidates: dict, in_body: bool = False) -> None:
+    """
+    Extracts everything found in the subtree of `element` (the whole document, or one
+    top-level unit when streaming) into `extracted_data` and `candidates`, in document order.
+
+    Args:
+        element: The subtree root.
+        extracted_data (dict): The result dict being filled (keywords, sections, tables_data).
+        candidates (dict): See _new_candidates; resolved by _finalize_extracted_data.
+        in_body (bool): True if `element` lies inside <body>, so all of its <sec> are body sections.
+    """
+    front_matter = _front_matter_scope(element, candidates)
+    if front_matter is not None:
+        # --- 1. Extract Article Title ---
+        candidates['article_titles'].extend(_ARTICLE_TITLE_XPATH(front_matter))
+        candidates['titles'].extend(_TITLE_XPATH(front_matter))
+
+        # --- 2. Extract Authors ---
+        for author_elem in _CONTRIB_AUTHOR_XPATH(front_matter):
+            author = _format_author(author_elem)
+            if author is not None:
+                candidates['contrib_authors'].append(author)
+        for author_elem in _AUTHOR_XPATH(front_matter):
+            author = _format_author(author_elem)
+            if author is not None:
+                candidates['fallback_authors'].append(author)
+
+        # --- 3. Extract Abstract ---
+        # Nested paragraphs (e.g. in an abstract's <list>) are matched by the XPath themselves
+        candidates['abstract_paragraphs'].extend(_paragraph_text(p) for p in _ABSTRACT_P_XPATH(front_matter))
+        candidates['abstract_texts'].extend("".join(a.itertext()) for a in _ABSTRACT_XPATH(front_matter))
+
+        # --- 4. Extract Keywords ---
+        keyword_elements = _KEYWORD_XPATH(front_matter)
+        if keyword_elements:
+            extracted_data['keywords'].extend(k.strip() for k in keyword_elements)
+
+    # --- 5. Extract Body Sections and Paragraphs (with Ancillary Removal) ---
+    # Get all <sec> elements within <body>. These usually represent sections like Intro, Methods, Results.
+    # Each comes with the text of all its <p> tags (including nested sections), excluding those in
+    # ref-lists, gathered by one walk of the body instead of one descendant scan per section.
+    sections = _body_sections(element, in_body) # Common for JATS XML to use <sec> tags for sections
+
+    all_body_paragraphs_flat_list = candidates['body_paragraphs'] # To keep a flat list of all body paragraphs (excluding refs)
+
+    for sec_element, section_paragraphs_text in sections:
+        section_title_element = _SEC_TITLE_XPATH(sec_element) # Get title of the section
+        section_title = section_title_element[0].strip() if section_title_element else "Untitled Section"
+        
+        # Clean paragraphs
+        cleaned_section_paragraphs = _normalize_texts(section_paragraphs_text)
+        
+        # Filter out ancillary sections (like acknowledgements, appendix, references)
+        # Apply _remove_references_from_paragraphs to the *full set* of paragraphs
+        # after collecting them, to ensure a global removal based on headers.
+        # However, for structured sections, we want to keep the current section's content.
+        # We'll rely on the _remove_references_from_paragraphs to work on the *flattened* list later.
+        
+        # Append paragraphs to the flat list
+        all_body_paragraphs_flat_list.extend(cleaned_section_paragraphs)
+
+        # Store section data
+        if cleaned_section_paragraphs: # Only add section if it has content
+            extracted_data['sections'].append({
+                'title': section_title,
+                'paragraphs': cleaned_section_paragraphs,
+                'content_flat': " ".join(cleaned_section_paragraphs) # Merged content for easier access
+            })
+
+
+    # --- 6. Extract Table Data ---
+    extracted_data['tables_data'].extend(iter_tables(element))
+
+
+def iter_tables(element):
+    """
+    Lazily yields the tables (<table-wrap> with at least one row) at or below `element`, e.g.
+    the root of a parsed document, as the dicts stored in extract_from_xml's 'tables_data':
+    id, caption, data_rows and the markdown text_representation. Each table is only built
+    when requested, so callers needing the first few tables can stop early.
+    """
+    for tw in _TABLE_WRAP_XPATH(element):
+        table_content_rows = []
+        
+        header_rows = _THEAD_ROW_XPATH(tw)
+        for h_row in header_rows:
+            table_content_rows.append(_row_cells(h_row))
+
+        body_rows = _TBODY_ROW_XPATH(tw)
+        for b_row in body_rows:
+            table_content_rows.append(_row_cells(b_row))
+        
+        if table_content_rows:
+            # Id and caption are looked up once, and only for tables that are kept
+            table_id = tw.get('id', 'N/A') # Attribute lookup instead of evaluating ./@id (twice)
+            table_caption = " ".join("".join(p.itertext()) for p in _CAPTION_P_XPATH(tw)).strip()
+
+            # Collect the lines and join once: repeated `str +=` is quadratic in the number of rows
+            markdown_lines = ["| " + " | ".join(table_content_rows[0]) + " |",
+                              "|-" + "-|-".join(["-" * max(3, len(col)) for col in table_content_rows[0]]) + "-|"]
+            markdown_lines.extend("| " + " | ".join(row) + " |" for row in table_content_rows[1:])
+            markdown_table_text = "\n".join(markdown_lines) + "\n"
+
+            yield {
+                'id': table_id,
+                'caption': table_caption,
+                'data_rows': table_content_rows,
+                'text_representation': markdown_table_text
+            }
+
+
+def _finalize_extracted_data(extracted_data: dict, candidates: dict) -> None:
+    """Resolves the document-wide values (with their fallbacks) gathered in `candidates`."""
+    title_element_text = candidates['article_titles'] or candidates['titles']
+    if title_element_text:
+        extracted_data['title'] = title_element_text[0].strip()
+
+    extracted_data['authors'] = candidates['contrib_authors'] if candidates['contrib_authors'] else candidates['fallback_authors']
+
+    abstract_elements = candidates['abstract_paragraphs'] or candidates['abstract_texts']
+    if abstract_elements:
+        # One pass over the joined paragraphs: whitespace at the joins collapses into the separating space
+        extracted_data['abstract'] = ' '.join(" ".join(abstract_elements).split())
+
+    # After collecting all sections and their paragraphs, apply global reference removal.
+    # Then drop repeated paragraphs, keeping the first occurrence: nested sections contribute
+    # their paragraphs to every enclosing section, and publishers repeat boilerplate.
+    extracted_data['body_paragraphs'] = list(dict.fromkeys(_remove_references_from_paragraphs(candidates['body_paragraphs'])))
+
+
+def _looks_like_xml(head: bytes) -> bool:
+    """
+    Cheap check of a file's first bytes, so that files which are clearly not XML articles
+    (PDF, plain text, HTML pages in a mixed folder) are rejected without being parsed: after
+    an optional byte order mark and whitespace, an XML document starts with markup.
+    """
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return True # Not sniffed; left to the parser
+    head = head.removeprefix(codecs.BOM_UTF8).lstrip().lower()
+    return head.startswith(b'<') and not head.startswith((b'<!doctype html', b'<html'))
+
+
+def _no_root_error(error_log) -> etree.XMLSyntaxError:
+    """The error for a file in which even the recovering parser found no element (e.g. not XML at all)."""
+    error = error_log.last_error
+    if error is None:
+        return etree.XMLSyntaxError("No root element found", 0, 0, 0)
+    return etree.XMLSyntaxError(error.message, error.type, error.line, error.column)
+
+
+def _iter_stream_units(xml_file_path: str):
+    """
+    Incrementally parses an XML file and yields (element, in_body) for each top-level unit as
+    soon as it is complete: every child of <body> (typically a top-level <sec>) and every other
+    child of the root element (<front>, <back>, ...). The caller must finish with a unit before
+    advancing; the unit is then cleared and detached, so at most one unit is held in memory.
+    """
+    context = etree.iterparse(xml_file_path, events=('end',), **_PARSER_OPTIONS)
+    for _, elem in context:
+        parent = elem.getparent()
+        if parent is None: # The root element itself
             continue
-        if in_ancillary_section:
+        grandparent = parent.getparent()
+        if grandparent is None: # A child of the root
+            if elem.tag == 'body':
+                continue # Its children were already yielded (and cleared) one by one
+            yield elem, False
+        elif parent.tag == 'body' and grandparent.getparent() is None:
+            yield elem, True
+        else:
             continue
-        processed_paragraphs.append(p)
-    final_cleaned_paragraphs = [
-        p for p in processed_paragraphs
-        if len(p) > 20 and not re.fullmatch(r'^\s*\d+\.?\s*$', p.strip())
-    ]
-    return final_cleaned_paragraphs
+        # Free the unit and everything before it
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del parent[0]
+    if context.root is None:
+        raise _no_root_error(context.error_log)
+
+
+def _pickle_path(xml_file_path: str, mtime_ns: int, size: int) -> str:
+    """
+    Where the result for this version of the file is pickled: beside the file, or in
+    XML_PICKLE_CACHE_DIR under a blake2b digest of its absolute path, mtime and size.
+    """
+    if not XML_PICKLE_CACHE_DIR:
+        return xml_file_path + _PICKLE_SUFFIX
+    key = f"{os.path.abspath(xml_file_path)}:{mtime_ns}:{size}"
+    return os.path.join(XML_PICKLE_CACHE_DIR, hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest() + ".pkl")
+
+
+def _load_pickled_result(xml_file_path: str, mtime_ns: int, size: int) -> dict | None:
+    """Returns the pickled result (see _pickle_path) if it was made from this version of the file."""
+    try:
+        with open(_pickle_path(xml_file_path, mtime_ns, size), 'rb') as f:
+            cached = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"  [Parser Warning] Ignoring unreadable cache file for {xml_file_path}: {e}")
+        return None
+    if cached.get('mtime_ns') != mtime_ns or cached.get('size') != size:
+        return None # Stale: the XML file changed since
+    extracted_data = cached['data']
+    extracted_data['file_path'] = xml_file_path # The directory may have been moved
+    return extracted_data
+
+
+def _store_pickled_result(xml_file_path: str, mtime_ns: int, size: int, extracted_data: dict) -> None:
+    """Pickles a result (see _pickle_path); written to a temporary file first so readers never see a partial one."""
+    pickle_path = _pickle_path(xml_file_path, mtime_ns, size)
+    tmp_path = f"{pickle_path}.{os.getpid()}.tmp"
+    try:
+        if XML_PICKLE_CACHE_DIR:
+            os.makedirs(XML_PICKLE_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'mtime_ns': mtime_ns, 'size': size, 'data': extracted_data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pickle_path)
+    except OSError as e:
+        print(f"  [Parser Warning] Could not write cache file for {xml_file_path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+class _ExtractionFailed(Exception):
+    """Raised by _extract_cached for a failed extraction, so that lru_cache does not memoize it."""
+
+
+@functools.lru_cache(maxsize=XML_MEMORY_CACHE_SIZE)
+def _extract_cached(xml_file_path: str, mtime_ns: int, size: int) -> dict:
+    """
+    Memoized _extract_from_xml_file. The file's mtime and size are part of the key, so a
+    modified file is parsed again. Failed extractions raise _ExtractionFailed and are neither
+    memoized nor pickled, so a transient failure (e.g. a file still being written) is retried.
+    """
+    if XML_PICKLE_CACHE:
+        extracted_data = _load_pickled_result(xml_file_path, mtime_ns, size)
+        if extracted_data is not None:
+            return extracted_data
+    extracted_data = _extract_from_xml_file(xml_file_path)
+    if extracted_data is None:
+        raise _ExtractionFailed(xml_file_path) # The error was already reported
+    if XML_PICKLE_CACHE:
+        _store_pickled_result(xml_file_path, mtime_ns, size, extracted_data)
+    return extracted_data
 
 
 def extract_from_xml(xml_file_path: str) -> dict | None:
@@ -43,6 +480,9 @@ def extract_from_xml(xml_file_path: str) -> dict | None:
     abstract, keywords, and body paragraphs. It attempts to remove reference/ancillary
     sections and to extract table data into a text-friendly format for the LLM.
     Crucially, it now also aims to identify and extract content for specific sections.
+    Files of XML_STREAM_PARSE_MIN_BYTES or more are parsed incrementally with the same result.
+    Results are cached while the file is unchanged (same mtime and size); see XML_PICKLE_CACHE
+    and XML_PICKLE_CACHE_DIR for reusing them across runs.
 
     XPath expressions might need adjustment based on the actual XML structure (JATS vs. custom).
 
@@ -53,7 +493,85 @@ def extract_from_xml(xml_file_path: str) -> dict | None:
         dict | None: A dictionary containing the extracted information if successful,
                      otherwise None.
     """
-    extracted_data = {
+    try:
+        st = os.stat(xml_file_path)
+    except OSError as e:
+        print(f"  [Parser Error] An unexpected error occurred processing {xml_file_path}: {e}")
+        return None
+    try:
+        extracted_data = _extract_cached(xml_file_path, st.st_mtime_ns, st.st_size)
+    except _ExtractionFailed:
+        return None
+    # Callers get their own copy, so modifying a result cannot alter the cached one
+    return copy.deepcopy(extracted_data)
+
+
+def extract_many(xml_file_paths: list[str], max_workers: int | None = None) -> dict[str, dict | None]:
+    """
+    Extracts many XML files in parallel worker processes (see extract_from_xml).
+    Extraction is CPU-bound Python and lxml work, so processes (not threads) are used.
+
+    Args:
+        xml_file_paths (list[str]): Paths of the XML files to extract.
+        max_workers (int | None): Number of worker processes. Defaults to os.cpu_count().
+
+    Returns:
+        dict[str, dict | None]: Maps each path to its extracted information (None if extraction failed).
+    """
+    if not xml_file_paths:
+        return {}
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        results = executor.map(extract_from_xml, xml_file_paths, chunksize=16)
+        return dict(zip(xml_file_paths, results))
+
+
+def extract_front_matter_from_xml(xml_file_path: str) -> dict | None:
+    """
+    Extracts only the front matter of an XML file: title, authors, abstract and keywords
+    (the other keys of extract_from_xml's result are left empty). The file is parsed
+    incrementally and parsing stops at the end of the article's <front>, so the body, back
+    matter and tables of even very large files are never read or built. Files without a
+    <front> are extracted in full with extract_from_xml.
+
+    Args:
+        xml_file_path (str): The path to the XML file.
+
+    Returns:
+        dict | None: The extracted information (see extract_from_xml) if successful, otherwise None.
+    """
+    extracted_data = _new_extracted_data(xml_file_path)
+    candidates = _new_candidates()
+
+    try:
+        with open(xml_file_path, 'rb') as f:
+            if not _looks_like_xml(f.read(_SNIFF_BYTES)):
+                print(f"  [Parser Error] Not an XML document, skipping: {xml_file_path}")
+                return None
+            f.seek(0)
+            context = etree.iterparse(f, events=('end',), tag='front', **_PARSER_OPTIONS)
+            # The article's own <front> ends before any <sub-article> one; nothing after it is parsed
+            _, front = next(context, (None, None))
+        if front is None:
+            if context.root is None:
+                raise _no_root_error(context.error_log)
+            return extract_from_xml(xml_file_path)
+
+        _collect_from_element(front, extracted_data, candidates)
+        _finalize_extracted_data(extracted_data, candidates)
+
+    except etree.XMLSyntaxError as e:
+        print(f"  [Parser Error] XML syntax error in {xml_file_path}: {e}")
+        return None
+    except Exception as e:
+        print(f"  [Parser Error] An unexpected error occurred processing {xml_file_path}: {e}")
+        return None
+
+    return extracted_data
+
+
+def _new_extracted_data(xml_file_path: str) -> dict:
+    """The result dict of extract_from_xml before anything has been extracted."""
+    return {
         'file_path': xml_file_path,
         'title': None,
         'authors': [],
@@ -64,113 +582,37 @@ def extract_from_xml(xml_file_path: str) -> dict | None:
         'tables_data': []       # List of dictionaries, each containing table ID, caption, and markdown data
     }
 
-    try:
-        tree = etree.parse(xml_file_path)
-        root = tree.getroot()
 
-        # --- 1. Extract Article Title ---
-        title_element_text = root.xpath('//article-title/text()')
-        if not title_element_text:
-            title_element_text = root.xpath('//title/text()')
-        if title_element_text:
-            extracted_data['title'] = title_element_text[0].strip()
+def _extract_from_xml_file(xml_file_path: str) -> dict | None:
+    """Parses and extracts an XML file without caching (see extract_from_xml)."""
+    extracted_data = _new_extracted_data(xml_file_path)
+    candidates = _new_candidates()
 
-        # --- 2. Extract Authors ---
-        authors_elements = root.xpath('//contrib[@contrib-type="author"]/name')
-        if not authors_elements:
-            authors_elements = root.xpath('//author')
-        for author_elem in authors_elements:
-            surname = author_elem.xpath('./surname/text()')
-            given_names = author_elem.xpath('./given-names/text()')
-            if surname and given_names:
-                extracted_data['authors'].append(f"{given_names[0].strip()} {surname[0].strip()}")
-            elif author_elem.text:
-                extracted_data['authors'].append(author_elem.text.strip())
+    try:
+        file_size = os.path.getsize(xml_file_path)
+        stream = file_size >= XML_STREAM_PARSE_MIN_BYTES
+        with open(xml_file_path, 'rb') as f:
+            # Small files are read whole in one call and parsed from the contiguous buffer
+            data = f.read() if file_size < min(_READ_WHOLE_MAX_BYTES, XML_STREAM_PARSE_MIN_BYTES) else None
+            head = f.read(_SNIFF_BYTES) if data is None else data[:_SNIFF_BYTES]
+        if not _looks_like_xml(head):
+            print(f"  [Parser Error] Not an XML document, skipping: {xml_file_path}")
+            return None
 
-        # --- 3. Extract Abstract ---
-        abstract_elements = root.xpath('//abstract//p/text()')
-        if not abstract_elements:
-            abstract_elements = root.xpath('//abstract/text()')
-        if abstract_elements:
-            extracted_data['abstract'] = " ".join([re.sub(r'\s+', ' ', a).strip() for a in abstract_elements if a.strip()])
+        if stream:
+            for unit, in_body in _iter_stream_units(xml_file_path):
+                _collect_from_element(unit, extracted_data, candidates, in_body)
+        else:
+            if data is not None:
+                root = etree.fromstring(data, _PARSER, base_url=xml_file_path)
+                del data # Only the tree is needed from here on
+            else:
+                root = etree.parse(xml_file_path, _PARSER).getroot()
+            if root is None:
+                raise _no_root_error(_PARSER.error_log)
+            _collect_from_element(root, extracted_data, candidates)
 
-        # --- 4. Extract Keywords ---
-        keyword_elements = root.xpath('//kwd-group/kwd/text()')
-        if keyword_elements:
-            extracted_data['keywords'] = [k.strip() for k in keyword_elements]
-
-        # --- 5. Extract Body Sections and Paragraphs (with Ancillary Removal) ---
-        # Get all <sec> elements within <body>. These usually represent sections like Intro, Methods, Results.
-        sections = root.xpath('//body//sec') # Common for JATS XML to use <sec> tags for sections
-
-        all_body_paragraphs_flat_list = [] # To keep a flat list of all body paragraphs (excluding refs)
-
-        for sec_element in sections:
-            section_title_element = sec_element.xpath('./title/text()') # Get title of the section
-            section_title = section_title_element[0].strip() if section_title_element else "Untitled Section"
-
-            # Get all <p> tags within this specific section, excluding those in ref-lists
-            # This XPath ensures we only get paragraphs belonging to this section, not nested ones from other sections
-            section_paragraphs_text = sec_element.xpath('.//p[not(ancestor::ref-list)]/text()')
-            
-            # Clean paragraphs
-            cleaned_section_paragraphs = [re.sub(r'\s+', ' ', p_text).strip() for p_text in section_paragraphs_text if p_text.strip()]
-            
-            # Filter out ancillary sections (like acknowledgements, appendix, references)
-            # Apply _remove_references_from_paragraphs to the *full set* of paragraphs
-            # after collecting them, to ensure a global removal based on headers.
-            # However, for structured sections, we want to keep the current section's content.
-            # We'll rely on the _remove_references_from_paragraphs to work on the *flattened* list later.
-            
-            # Append paragraphs to the flat list
-            all_body_paragraphs_flat_list.extend(cleaned_section_paragraphs)
-
-            # Store section data
-            if cleaned_section_paragraphs: # Only add section if it has content
-                extracted_data['sections'].append({
-                    'title': section_title,
-                    'paragraphs': cleaned_section_paragraphs,
-                    'content_flat': " ".join(cleaned_section_paragraphs) # Merged content for easier access
-                })
-        
-        # After collecting all sections and their paragraphs, apply global reference removal
-        extracted_data['body_paragraphs'] = _remove_references_from_paragraphs(all_body_paragraphs_flat_list)
-
-
-        # --- 6. Extract Table Data ---
-        table_wraps = root.xpath('//table-wrap')
-
-        for tw in table_wraps:
-            table_id = tw.xpath('./@id')[0] if tw.xpath('./@id') else 'N/A'
-            table_caption = " ".join(tw.xpath('./caption//p/text()')).strip() if tw.xpath('./caption//p/text()') else ''
-            
-            table_content_rows = []
-            
-            header_rows = tw.xpath('.//thead/tr')
-            for h_row in header_rows:
-                cells = h_row.xpath('.//td/text() | .//th/text()')
-                table_content_rows.append([c.strip() for c in cells])
-
-            body_rows = tw.xpath('.//tbody/tr')
-            for b_row in body_rows:
-                cells = b_row.xpath('.//td/text() | .//th/text()')
-                table_content_rows.append([c.strip() for c in cells])
-            
-            if table_content_rows:
-                markdown_table_text = ""
-                if table_content_rows:
-                    markdown_table_text += "| " + " | ".join(table_content_rows[0]) + " |\n"
-                    markdown_table_text += "|-" + "-|-".join(["-" * max(3, len(col)) for col in table_content_rows[0]]) + "-|\n"
-                    for row in table_content_rows[1:]:
-                        markdown_table_text += "| " + " | ".join(row) + " |\n"
-
-                extracted_data['tables_data'].append({
-                    'id': table_id,
-                    'caption': table_caption,
-                    'data_rows': table_content_rows,
-                    'text_representation': markdown_table_text
-                })
-        
+        _finalize_extracted_data(extracted_data, candidates)
 
     except etree.XMLSyntaxError as e:
         print(f"  [Parser Error] XML syntax error in {xml_file_path}: {e}")
@@ -246,6 +688,7 @@ if __name__ == '__main__':
                 </table>
             </table-wrap>
             <p>Drug loading content was found to be 10% (w/w).</p>
+            <p>Two further formulations were prepared:<list><list-item><p>Formulation B with 30 kDa PLGA and 1% PVA.</p></list-item><list-item><p>Formulation C with 90 kDa PLGA and 2% PVA.</p></list-item></list> Both were freeze-dried.</p>
         </sec>
         <sec id="s3" sec-type="results"><title>3. Results and Discussion</title>
             <p>The synthesized nanoparticles showed a narrow size distribution. The high encapsulation efficiency indicates suitability for drug loading.</p>
@@ -307,4 +750,10 @@ if __name__ == '__main__':
             else:
                 print(f"{key}: {value}")
     else:
-        print("XML extraction failed.")
\ No newline at end of file
+        print("XML extraction failed.")
+
+    # Paragraphs nested in a <p> (here the list items) are extracted once, on their own
+    if extracted:
+        nested_ok = (extracted['body_paragraphs'].count("Formulation B with 30 kDa PLGA and 1% PVA.") == 1
+                     and "Two further formulations were prepared: Both were freeze-dried." in extracted['body_paragraphs'])
+        print(f"\nNested paragraph check: {'OK' if nested_ok else 'FAILED'}")